@@ -0,0 +1,237 @@
+import re
+import json
+import hashlib
+import math
+import logging
+from decimal import Decimal
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Product, ProductAnalysis
+from .search import STOP_WORDS
+
+logger = logging.getLogger(__name__)
+
+# Words considered by the local keyword and sentiment pass
+WORD_PATTERN = re.compile(r'[a-z][a-z0-9]+')
+
+# Small sentiment lexicon for descriptions of unrated products
+POSITIVE_WORDS = frozenset(
+    'amazing best comfortable durable easy excellent fast great high lightweight love '
+    'perfect powerful premium quality reliable smooth stable strong stunning superior'.split()
+)
+NEGATIVE_WORDS = frozenset(
+    'bad broken cheap defective difficult fragile heavy loud noisy poor problem slow '
+    'weak worse worst'.split()
+)
+
+KEYWORDS_PER_PRODUCT = 8
+SUMMARY_CHARS = 200
+
+ANALYSIS_FIELDS = ['summary', 'sentiment_score', 'keywords', 'content_hash']
+
+# Product fields an analysis is built from; it is redone when one of them changes
+ANALYZED_FIELDS = ['name', 'description', 'price', 'rating']
+
+LLM_SYSTEM_PROMPT = (
+    "You analyze e-commerce products. For every product you are given, return a "
+    "JSON object with a \"products\" array holding one entry per product: "
+    "{\"id\": <product id>, \"summary\": <one sentence>, \"sentiment\": <number "
+    "from -1 to 1>, \"keywords\": [<up to 8 short keywords>]}. Return only JSON."
+)
+
+def content_hash(values):
+    """Return a digest of a product's ANALYZED_FIELDS values, in that order."""
+    content = json.dumps([None if value is None else str(value) for value in values])
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def product_content_hash(product):
+    """Return the content hash of a Product instance."""
+    return content_hash([getattr(product, field) for field in ANALYZED_FIELDS])
+
+def products_needing_analysis(chunk_size=2000):
+    """Return the IDs of the products with no analysis or whose analyzed fields changed.
+    
+    Imports set last_updated on every row they write, changed or not, so a
+    product updated since its analysis is only a candidate: its content hash
+    is compared with the one stored on the analysis. Analyses of unchanged
+    candidates are marked current so later runs skip them without hashing.
+    """
+    candidates = Product.objects.filter(
+        Q(analysis__isnull=True) | Q(analysis__updated_at__lt=F('last_updated'))
+    ).order_by('id').values_list('id', 'analysis__content_hash', *ANALYZED_FIELDS)
+    
+    ids = []
+    unchanged = []
+    for product_id, stored_hash, *values in candidates.iterator(chunk_size=chunk_size):
+        if stored_hash and stored_hash == content_hash(values):
+            unchanged.append(product_id)
+        else:
+            ids.append(product_id)
+    
+    for offset in range(0, len(unchanged), chunk_size):
+        ProductAnalysis.objects.filter(
+            product_id__in=unchanged[offset:offset + chunk_size]
+        ).update(updated_at=timezone.now())
+    return ids
+
+def _summary(description):
+    """Return the first sentence of a description, truncated to SUMMARY_CHARS."""
+    text = ' '.join(description.split())
+    sentence = re.split(r'(?<=[.!?])\s', text, maxsplit=1)[0]
+    return sentence[:SUMMARY_CHARS]
+
+def _score(value):
+    """Clamp a sentiment to [-1, 1] and round it for the sentiment_score column."""
+    return Decimal(str(round(max(-1.0, min(1.0, float(value))), 2)))
+
+def _document_words(name, description):
+    """Return the words of a product considered for keywords, in order."""
+    return [word for word in WORD_PATTERN.findall(f"{name} {description}".lower()) if word not in STOP_WORDS]
+
+def document_frequencies(chunk_size=2000):
+    """Count the products each word appears in over the whole catalog.
+    
+    Returns (document frequencies, number of products). Computed once per run
+    and passed to local_analysis, so a product's keywords do not depend on
+    which batch it is analyzed in.
+    """
+    document_frequency = Counter()
+    total = 0
+    for name, description in Product.objects.order_by().values_list('name', 'description').iterator(chunk_size=chunk_size):
+        document_frequency.update(set(_document_words(name, description)))
+        total += 1
+    return document_frequency, total
+
+def local_analysis(products, corpus=None):
+    """Analyze a batch of products without an LLM.
+    
+    Keywords are the words of each product with the highest TF-IDF weight.
+    `corpus` is the (document frequencies, number of products) pair from
+    document_frequencies(); without it the frequencies are counted over the
+    catalog first. Sentiment comes from the star rating when there is one and
+    from a word lexicon otherwise.
+    """
+    document_frequency, total = corpus or document_frequencies()
+    documents = [_document_words(product.name, product.description) for product in products]
+    
+    analyses = {}
+    for product, words in zip(products, documents):
+        counts = Counter(words)
+        weights = {
+            word: count / len(words) * math.log((1 + total) / (1 + document_frequency[word]))
+            for word, count in counts.items()
+        }
+        keywords = sorted(weights, key=weights.get, reverse=True)[:KEYWORDS_PER_PRODUCT]
+        
+        if product.rating is not None:
+            sentiment = (float(product.rating) - 3) / 2
+        else:
+            positive = sum(counts[word] for word in POSITIVE_WORDS)
+            negative = sum(counts[word] for word in NEGATIVE_WORDS)
+            sentiment = (positive - negative) / (positive + negative) if positive + negative else 0
+        
+        analyses[product.id] = {
+            'summary': _summary(product.description),
+            'sentiment_score': _score(sentiment),
+            'keywords': {word: round(weights[word], 4) for word in keywords},
+            'content_hash': product_content_hash(product),
+        }
+    return analyses
+
+def llm_analysis(client, model, products):
+    """Analyze a batch of products with a single chat completion.
+    
+    Returns the analyses keyed by product ID. Products the model left out or
+    answered malformed are missing from the result.
+    """
+    listing = '\n'.join(
+        f"[{product.id}] {product.name} (${product.price}, rating {product.rating}): {product.description[:500]}"
+        for product in products
+    )
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": LLM_SYSTEM_PROMPT},
+            {"role": "user", "content": listing}
+        ],
+        temperature=0,
+        response_format={"type": "json_object"}
+    )
+    
+    entries = json.loads(response.choices[0].message.content).get('products', [])
+    wanted = {product.id: product for product in products}
+    analyses = {}
+    for entry in entries:
+        try:
+            product_id = int(entry['id'])
+            if product_id not in wanted:
+                continue
+            if not isinstance(entry['keywords'], list):
+                raise TypeError("keywords must be a list")
+            # The model lists keywords most relevant first; weight them by rank
+            keywords = [str(keyword) for keyword in entry['keywords'][:KEYWORDS_PER_PRODUCT]]
+            analyses[product_id] = {
+                'summary': str(entry['summary'])[:1000],
+                'sentiment_score': _score(entry['sentiment']),
+                'keywords': {keyword: round(1 - rank / len(keywords), 4) for rank, keyword in enumerate(keywords)},
+                'content_hash': product_content_hash(wanted[product_id]),
+            }
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Skipping malformed analysis entry: {entry}")
+    return analyses
+
+def save_analyses(analyses):
+    """Insert or update the analyses (keyed by product ID) with one upsert."""
+    ProductAnalysis.objects.bulk_create(
+        [ProductAnalysis(product_id=product_id, **fields) for product_id, fields in analyses.items()],
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=ANALYSIS_FIELDS + ['updated_at']
+    )
+
+def _analyze_batch(client, model, products, corpus):
+    """Analyze a batch with the LLM, falling back to the local pass for whatever it misses."""
+    analyses = {}
+    try:
+        analyses = llm_analysis(client, model, products)
+    except Exception as e:
+        logger.warning(f"LLM analysis failed, using the local pass: {str(e)}")
+    missing = [product for product in products if product.id not in analyses]
+    if missing:
+        analyses.update(local_analysis(missing, corpus))
+    return analyses
+
+def analyze_products(ids, client=None, batch_size=20, workers=4, progress=None):
+    """Analyze and save the products with the given IDs, returning how many were analyzed.
+    
+    With an LLM `client`, batches of `batch_size` products are sent `workers`
+    at a time and whatever the model misses goes through the local pass.
+    Without one the local pass runs over each round at once. `progress`, if
+    given, is called with the number of products analyzed after every round.
+    """
+    analyzed = 0
+    # Keyword weights use document frequencies over the whole catalog, counted
+    # once here for the local pass and the products the LLM leaves out
+    corpus = document_frequencies() if ids else None
+    round_size = batch_size * workers
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for offset in range(0, len(ids), round_size):
+            products = list(Product.objects.filter(id__in=ids[offset:offset + round_size]).order_by('id'))
+            if client is None:
+                # The local pass is cheap; run it over the whole round at once
+                batches_analyses = [local_analysis(products, corpus)]
+            else:
+                batches = [products[i:i + batch_size] for i in range(0, len(products), batch_size)]
+                batches_analyses = executor.map(
+                    lambda batch: _analyze_batch(client, settings.INSIGHTS_MODEL, batch, corpus), batches
+                )
+            
+            for analyses in batches_analyses:
+                save_analyses(analyses)
+                analyzed += len(analyses)
+            if progress:
+                progress(analyzed)
+    return analyzed
@@ -0,0 +1,111 @@
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from .cache import get_data_version
+
+# Words and numbers in a question
+WORD_PATTERN = re.compile(r'\w+')
+
+def normalize_question(question):
+    """Normalize a question so case, punctuation and spacing do not change its key."""
+    return ' '.join(WORD_PATTERN.findall(question.lower()))
+
+# Rough characters-per-token ratio of English text for budgeting prompts
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    """Estimate the number of tokens the model will count in `text`."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def pack_context(products, max_tokens, name_chars=100, description_chars=150):
+    """Describe as many of `products` (most relevant first) as fit in `max_tokens`.
+    
+    Each product gets one line with the start of its name, its price and
+    rating, and the start of its description. Packing stops at the first product whose line no longer
+    fits, so the most relevant ones are always kept.
+    """
+    lines = []
+    used = 0
+    for product in products:
+        rating = f", rated {product.rating}/5" if product.rating is not None else ""
+        description = product.description[:description_chars]
+        line = f"- {product.name[:name_chars]} (${product.price}{rating}): {description}\n"
+        tokens = estimate_tokens(line)
+        if used + tokens > max_tokens:
+            break
+        lines.append(line)
+        used += tokens
+    return ''.join(lines)
+
+def sse_event(event, data):
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class AnswerCache:
+    """An in-process LRU cache of insight answers with a TTL.
+    
+    Answers are keyed on the data version, the product ID and the normalized
+    question, so an import invalidates every answer at once. When
+    `similarity` is set, a miss on the exact key falls back to the cached
+    question about the same product with the highest word-set (Jaccard)
+    similarity, if it reaches the threshold. That tier is lossy: word sets
+    ignore order and negation, so it can return the answer to a question
+    with the opposite meaning. When the cache holds
+    `max_entries` answers the least recently used one is evicted.
+    """
+    
+    def __init__(self, max_entries=1000, ttl=60 * 60, similarity=None):
+        """Initialize an empty cache."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, question, product_id=None):
+        """Return the cached answer for a question, or None on a miss."""
+        scope = (get_data_version(), product_id)
+        normalized = normalize_question(question)
+        now = time.monotonic()
+        
+        with self.lock:
+            key = (scope, normalized)
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self.entries[key]
+                entry = None
+            
+            if entry is None and self.similarity:
+                key, entry = self._find_similar(scope, set(normalized.split()), now)
+            
+            if entry is None:
+                return None
+            
+            self.entries.move_to_end(key)
+            return entry[2]
+    
+    def _find_similar(self, scope, words, now):
+        """Return the (key, entry) of the closest live question in `scope`, or (None, None)."""
+        best_key, best_entry, best_score = None, None, self.similarity
+        for key, entry in self.entries.items():
+            expires_at, cached_words, _ = entry
+            if key[0] != scope or expires_at <= now or not (words or cached_words):
+                continue
+            score = len(words & cached_words) / len(words | cached_words)
+            if score >= best_score:
+                best_key, best_entry, best_score = key, entry, score
+        return best_key, best_entry
+    
+    def set(self, question, answer, product_id=None):
+        """Cache the answer to a question."""
+        normalized = normalize_question(question)
+        key = ((get_data_version(), product_id), normalized)
+        entry = (time.monotonic() + self.ttl, set(normalized.split()), answer)
+        
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
@@ -0,0 +1,119 @@
+import time
+import hashlib
+import functools
+from urllib.parse import urlencode
+from django.core.cache import cache, caches
+from django.db import connection
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework.response import Response
+
+# Cache key holding the version of the product data, bumped by every import
+DATA_VERSION_KEY = 'products:data_version'
+
+# Counts are invalidated by imports; the timeout only bounds stale entries
+COUNT_TIMEOUT = 60 * 60
+
+# Cache alias holding serialized API responses
+RESPONSE_CACHE_ALIAS = 'responses'
+
+def get_data_version():
+    """Return the current product data version."""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        # A fresh version can never match entries cached under an evicted one
+        version = time.time_ns()
+        if not cache.add(DATA_VERSION_KEY, version, None):
+            version = cache.get(DATA_VERSION_KEY, version)
+    return version
+
+def bump_data_version():
+    """Invalidate every cached value derived from the product data."""
+    version = time.time_ns()
+    cache.set(DATA_VERSION_KEY, version, None)
+    return version
+
+def get_product_count(queryset, estimate=False):
+    """Return the number of rows in a product queryset, cached until the next import.
+    
+    With `estimate` set, an unfiltered count on PostgreSQL is read from the
+    planner statistics instead of scanning the table.
+    """
+    query_hash = hashlib.sha1(str(queryset.query).encode('utf-8')).hexdigest()
+    estimate = estimate and not queryset.query.where
+    key = f"products:count:{get_data_version()}:{'estimate' if estimate else 'exact'}:{query_hash}"
+    
+    count = cache.get(key)
+    if count is None:
+        count = _estimate_count(queryset.model) if estimate else None
+        if count is None:
+            count = queryset.count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+def _estimate_count(model):
+    """Return the planner's row estimate for a table, or None if unavailable."""
+    if connection.vendor != 'postgresql':
+        return None
+    
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    
+    # reltuples is -1 (or 0) until the table has been analyzed
+    if not row or row[0] <= 0:
+        return None
+    return row[0]
+
+def cached_response(handler):
+    """Cache the response data of a read-only APIView handler until the next import.
+    
+    Responses are keyed on the path and the canonical (sorted) query string
+    under the current data version, and carry a strong ETag and a
+    Last-Modified date derived from that version. A request whose
+    If-None-Match or If-Modified-Since still matches gets a 304 Not Modified
+    before the handler, the database or the serializers are touched. Only
+    200 responses are cached.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        version = get_data_version()
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        digest = hashlib.sha1(f"{request.path}?{query}".encode('utf-8')).hexdigest()
+        
+        # The rendered body differs per format, so the ETag does too
+        etag = f'"{version:x}-{digest[:16]}-{request.accepted_renderer.format}"'
+        last_modified = version // 1_000_000_000
+        
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            not_modified = etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+        else:
+            since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+            not_modified = since is not None and since >= last_modified
+        
+        if not_modified:
+            response = Response(status=304)
+        else:
+            key = f"products:response:{version}:{digest}"
+            response_cache = caches[RESPONSE_CACHE_ALIAS]
+            data = response_cache.get(key)
+            if data is None:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response_cache.set(key, response.data)
+            else:
+                response = Response(data)
+        
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Let clients keep the body but revalidate it on every use
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
+    
+    return wrapper
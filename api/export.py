@@ -0,0 +1,62 @@
+import io
+import csv
+import json
+import zlib
+from datetime import datetime
+from decimal import Decimal
+
+# Columns written by the catalog export, in output order
+EXPORT_FIELDS = ['id', 'name', 'price', 'rating', 'description', 'url', 'asin', 'source', 'image_url', 'last_updated']
+
+# Rows fetched per database round trip and written per streamed chunk
+EXPORT_CHUNK_SIZE = 2000
+
+def _export_value(value):
+    """Convert a column value to the form the detail endpoint renders it in."""
+    if isinstance(value, Decimal):
+        return '{:f}'.format(value)
+    if isinstance(value, datetime):
+        return value.isoformat().replace('+00:00', 'Z')
+    raise TypeError(f"Cannot export value of type {type(value).__name__}")
+
+def _chunks(rows, size):
+    """Group an iterator of rows into lists of at most `size` rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_ndjson(rows, fields=EXPORT_FIELDS, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield `values_list` rows as newline-delimited JSON, one string per chunk of rows."""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_export_value)
+    for chunk in _chunks(rows, chunk_size):
+        yield ''.join(encoder.encode(dict(zip(fields, row))) + '\n' for row in chunk)
+
+def iter_csv(rows, fields=EXPORT_FIELDS, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield a header line and then `values_list` rows as CSV, one string per chunk of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    
+    for chunk in _chunks(rows, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [_export_value(value) if isinstance(value, (Decimal, datetime)) else value for value in row]
+            for row in chunk
+        )
+        yield buffer.getvalue()
+
+def gzip_stream(chunks):
+    """Compress a stream of strings on the fly into a single gzip member."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
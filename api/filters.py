@@ -0,0 +1,15 @@
+import django_filters
+from .models import Product
+
+class ProductFilter(django_filters.FilterSet):
+    """Query parameter filters for the product list."""
+    
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    min_rating = django_filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    source = django_filters.CharFilter(field_name='source')
+    scraped_after = django_filters.IsoDateTimeFilter(field_name='last_updated', lookup_expr='gte')
+    
+    class Meta:
+        model = Product
+        fields = ['min_price', 'max_price', 'min_rating', 'source', 'scraped_after']
@@ -0,0 +1,201 @@
+import os
+import hashlib
+import logging
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import ScrapeJob
+
+logger = logging.getLogger(__name__)
+
+# Directory holding each job's scraped output, one subdirectory per job and attempt
+JOB_OUTPUT_DIR = os.path.join('data', 'jobs')
+
+class JobLost(Exception):
+    """Raised when a running job was requeued and claimed by another worker."""
+
+def normalize_categories(categories):
+    """Return the categories lowercased, trimmed, deduplicated and sorted."""
+    return sorted({' '.join(str(category).lower().split()) for category in categories} - {''})
+
+def category_key(categories, max_age_hours=None):
+    """Return the key identifying a scrape of a set of normalized categories.
+    
+    A full scrape and incremental ones with different age limits refresh
+    different products, so the age limit is part of the key.
+    """
+    mode = 'full' if max_age_hours is None else f'max_age={float(max_age_hours)!r}'
+    return hashlib.sha1('\n'.join([mode] + categories).encode('utf-8')).hexdigest()
+
+def category_urls(categories):
+    """Build the Amazon search URLs for a list of categories."""
+    # Replace spaces with plus signs for URL formatting
+    return [f"https://www.amazon.com/s?k={category.replace(' ', '+')}" for category in categories]
+
+def enqueue_scrape_job(categories, max_products, max_age_hours=None):
+    """Queue a scrape of `categories`, coalescing with an active job for the same ones.
+    
+    Returns (job, created). When a queued or running job already covers the
+    same categories with the same `max_age_hours` it is returned instead of
+    queuing a duplicate; a queued one is widened to the larger
+    `max_products`. A partial unique constraint on the category key keeps
+    concurrent requests from both queuing a job.
+    """
+    categories = normalize_categories(categories)
+    key = category_key(categories, max_age_hours)
+    
+    for _ in range(3):
+        active = ScrapeJob.objects.filter(category_key=key, status__in=ScrapeJob.ACTIVE_STATUSES).first()
+        if active is not None:
+            if active.max_products < max_products:
+                ScrapeJob.objects.filter(id=active.id, status=ScrapeJob.QUEUED).update(max_products=max_products)
+                active.refresh_from_db()
+            return active, False
+        
+        try:
+            with transaction.atomic():
+                job = ScrapeJob.objects.create(
+                    categories=categories,
+                    category_key=key,
+                    max_products=max_products,
+                    max_age_hours=max_age_hours
+                )
+            return job, True
+        except IntegrityError:
+            # Another request queued the same categories in the meantime
+            continue
+    
+    raise RuntimeError(f"Could not queue a scrape job for {', '.join(categories)}")
+
+def claim_next_job():
+    """Atomically move the oldest queued job to running and return it, or None."""
+    while True:
+        job = ScrapeJob.objects.filter(status=ScrapeJob.QUEUED).order_by('created_at', 'id').first()
+        if job is None:
+            return None
+        
+        # Only one worker's conditional update can match the queued row
+        claimed = ScrapeJob.objects.filter(id=job.id, status=ScrapeJob.QUEUED).update(
+            status=ScrapeJob.RUNNING,
+            attempt=F('attempt') + 1,
+            started_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+def requeue_stale_jobs(stale_after):
+    """Return running jobs whose worker stopped sending progress for `stale_after` seconds to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    count = ScrapeJob.objects.filter(status=ScrapeJob.RUNNING, updated_at__lt=cutoff).update(
+        status=ScrapeJob.QUEUED,
+        started_at=None,
+        updated_at=timezone.now()
+    )
+    if count:
+        logger.warning(f"Requeued {count} scrape jobs abandoned by their worker")
+    return count
+
+def run_scrape_job(job, concurrency=1, delay=2):
+    """Scrape, import and analyze one claimed job, recording its progress and outcome.
+    
+    Every update is made only while the job is still running under this
+    attempt. If it was requeued as stale and claimed by another worker, the
+    next update raises JobLost and this run stops without touching the job.
+    """
+    from django.conf import settings
+    from scraper.scraper import EcommerceScraper
+    from scraper.cache import PageCache
+    from scraper.import_data import import_amazon_data, load_scrape_times
+    from .analysis import products_needing_analysis, analyze_products
+    from .llm import get_llm_client
+    
+    this_attempt = ScrapeJob.objects.filter(id=job.id, status=ScrapeJob.RUNNING, attempt=job.attempt)
+    
+    def update_job(**fields):
+        # Each update doubles as the worker's heartbeat
+        if not this_attempt.update(updated_at=timezone.now(), **fields):
+            raise JobLost(f"Scrape job {job.id} attempt {job.attempt} was claimed by another worker")
+    
+    logger.info(f"Running scrape job {job.id} (attempt {job.attempt}) for categories: "
+                f"{', '.join(job.categories)}, max_products={job.max_products}")
+    
+    try:
+        # Each attempt writes its own files, so a requeued job never shares them
+        output_dir = os.path.join(JOB_OUTPUT_DIR, str(job.id), str(job.attempt))
+        scraper = EcommerceScraper(
+            base_url='https://www.amazon.com',
+            output_dir=output_dir,
+            delay=delay,
+            concurrency=concurrency,
+            cache=PageCache(
+                cache_dir=settings.SCRAPER_CACHE_DIR,
+                ttl=settings.SCRAPER_CACHE_TTL,
+                max_bytes=settings.SCRAPER_CACHE_MAX_BYTES
+            )
+        )
+        
+        # In incremental mode only refresh new or stale products
+        known_products = None
+        max_age = None
+        if job.max_age_hours is not None:
+            known_products = load_scrape_times()
+            max_age = job.max_age_hours * 60 * 60
+        
+        scraper.scrape_products(
+            category_urls(job.categories),
+            max_products=job.max_products,
+            known_products=known_products,
+            max_age=max_age,
+            progress=update_job
+        )
+        
+        import_amazon_data(
+            os.path.join(output_dir, 'amazon_products.json'),
+            raise_errors=True,
+            progress=update_job
+        )
+        
+        # Analyze the new and changed products so insights can use them
+        client = get_llm_client(settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+        analyze_products(products_needing_analysis(), client=client, progress=lambda analyzed: update_job())
+        
+        update_job(status=ScrapeJob.SUCCEEDED, finished_at=timezone.now())
+        job.refresh_from_db()
+        logger.info(f"Scrape job {job.id} finished: added {job.products_added}, updated {job.products_updated}")
+        
+    except JobLost as e:
+        logger.warning(str(e))
+    except Exception as e:
+        logger.error(f"Scrape job {job.id} failed: {str(e)}")
+        this_attempt.update(
+            status=ScrapeJob.FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+    
+    job.refresh_from_db()
+    return job
+
+def job_status(job):
+    """Return the JSON representation of a job reported by the API."""
+    return {
+        'id': job.id,
+        'status': job.status,
+        'categories': job.categories,
+        'max_products': job.max_products,
+        'max_age_hours': job.max_age_hours,
+        'attempt': job.attempt,
+        'links_found': job.links_found,
+        'products_scraped': job.products_scraped,
+        'products_added': job.products_added,
+        'products_updated': job.products_updated,
+        'error': job.error or None,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'status_url': f'/api/scrape/{job.id}/',
+    }
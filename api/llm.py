@@ -0,0 +1,27 @@
+import threading
+from django.conf import settings
+from openai import OpenAI
+
+# Process-wide clients keyed on (API key, base URL)
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_llm_client(api_key):
+    """Return the process-wide OpenAI client for an API key.
+    
+    Each client owns a pooled HTTP connection, so sharing one across
+    requests reuses warm keep-alive connections instead of paying DNS, TCP
+    and TLS setup on every question. OPENAI_BASE_URL points the client at
+    any compatible server, such as a local model or a stub.
+    """
+    key = (api_key, settings.OPENAI_BASE_URL)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OpenAI(
+                api_key=api_key,
+                base_url=settings.OPENAI_BASE_URL or None,
+                timeout=settings.INSIGHTS_TIMEOUT
+            )
+            _clients[key] = client
+    return client
@@ -0,0 +1,43 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.analysis import products_needing_analysis, analyze_products
+from api.llm import get_llm_client
+
+
+class Command(BaseCommand):
+    help = "Fill in ProductAnalysis for new and changed products"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20, help='Products analyzed per LLM call')
+        parser.add_argument('--workers', type=int, default=4, help='LLM calls in flight at once')
+        parser.add_argument('--limit', type=int, help='Analyze at most this many products')
+        parser.add_argument('--offline', action='store_true',
+                            help='Use the local keyword and sentiment pass instead of the LLM')
+
+    def handle(self, *args, **options):
+        client = None
+        if not options['offline']:
+            if settings.OPENAI_API_KEY:
+                client = get_llm_client(settings.OPENAI_API_KEY)
+            else:
+                self.stderr.write("OPENAI_API_KEY is not set, using the local pass")
+
+        # Collect the IDs up front, since saving analyses changes what the query matches
+        ids = products_needing_analysis()
+        if options['limit'] is not None:
+            ids = ids[:options['limit']]
+
+        start = time.perf_counter()
+        analyzed = analyze_products(
+            ids,
+            client=client,
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            progress=lambda count: self.stdout.write(f"Analyzed {count}/{len(ids)} products")
+        )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Analyzed {analyzed} products in {elapsed:.1f}s ({'LLM' if client else 'local pass'})"
+        ))
@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from api.models import Product
+from api.serializers import ProductSerializer, PRODUCT_LIST_FIELDS, serialize_product_values
+
+
+class Command(BaseCommand):
+    help = "Compare ProductSerializer with the .values() list serializer in rows per second"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=500, help='Rows per serialized page')
+        parser.add_argument('--repeat', type=int, default=20, help='Number of pages serialized per path')
+
+    def model_serializer(self, queryset):
+        """Fetch and render a page the way the list view used to."""
+        return JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+
+    def values_serializer(self, queryset):
+        """Fetch and render a page through serialize_product_values."""
+        return JSONRenderer().render(serialize_product_values(list(queryset.values(*PRODUCT_LIST_FIELDS))))
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.order_by('-id')[:options['page_size']]
+        rows = queryset.count()
+        if not rows:
+            raise CommandError("No products to serialize; import some first")
+
+        if self.model_serializer(queryset) != self.values_serializer(queryset):
+            raise CommandError("The two serializers produced different output")
+        self.stdout.write(f"Output is byte-identical for {rows} rows")
+
+        for label, serialize in [("ProductSerializer", self.model_serializer), (".values() path", self.values_serializer)]:
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                serialize(queryset)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{label:<18} {rows * options['repeat'] / elapsed:10.0f} rows/sec")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from api.models import Product, ProductStats
+from api.pagination import order_products, filter_after, keyset_querysets
+
+
+class Command(BaseCommand):
+    help = "Print the query plans of the hot API and import queries"
+
+    def hot_queries(self):
+        """Return (label, queryset) pairs for the queries the endpoints and importer run most."""
+        return [
+            ("Product list, offset page", Product.objects.order_by('-id')[1000:1020]),
+            ("Product list, cursor page", Product.objects.filter(id__lt=1000).order_by('-id')[:21]),
+            ("Product list, price cursor page", filter_after(
+                order_products(Product.objects.all(), 'price', False),
+                {'id': 1000, 'sort': 'price', 'value': '100.00'}, 'price', 'price', False
+            )[:21]),
+            ("Product list, rating cursor page", keyset_querysets(
+                Product.objects.all(), {'id': 1000, 'sort': '-rating', 'value': '4.5'}, '-rating', 'rating', True
+            )[0][:21]),
+            ("Product list, rating filter", Product.objects.filter(rating__gte=4, price__lte=500).order_by('-rating', '-price')[:20]),
+            ("Product stats snapshot", ProductStats.objects.filter(pk=1)),
+            ("Import lookup by ASIN/URL", Product.objects.filter(Q(asin__in=['B000000000']) | Q(url__in=['https://www.amazon.com/s?k=x'])).order_by()),
+            ("Stale products for a source", Product.objects.filter(source='amazon', last_updated__lt=timezone.now() - timedelta(days=1)).order_by()),
+        ]
+
+    def handle(self, *args, **options):
+        for label, queryset in self.hot_queries():
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write("")
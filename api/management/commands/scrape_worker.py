@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.jobs import claim_next_job, requeue_stale_jobs, run_scrape_job
+
+
+class Command(BaseCommand):
+    help = "Run queued scrape jobs from POST /api/scrape/"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=5, help='Seconds between queue polls when idle')
+        parser.add_argument('--stale-after', type=float, default=15 * 60,
+                            help='Requeue running jobs that reported no progress for this many seconds')
+        parser.add_argument('--concurrency', type=int, default=1, help='Product pages fetched in parallel per job')
+        parser.add_argument('--delay', type=float, default=2, help='Delay between requests in seconds')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Scrape worker started")
+        while True:
+            close_old_connections()
+            requeue_stale_jobs(options['stale_after'])
+
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Running scrape job {job.id} for {', '.join(job.categories)}")
+            job = run_scrape_job(job, concurrency=options['concurrency'], delay=options['delay'])
+            self.stdout.write(
+                f"Scrape job {job.id} {job.status}: {job.products_scraped} scraped, "
+                f"{job.products_added} added, {job.products_updated} updated"
+            )
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-17 02:58
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="url",
+            field=models.URLField(blank=True, db_index=True, max_length=1024),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="source",
+            field=models.CharField(default="amazon", max_length=50),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="image_url",
+            field=models.URLField(blank=True, max_length=1024, null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="last_updated",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
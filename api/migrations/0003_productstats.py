@@ -0,0 +1,53 @@
+# Generated by Django 4.2.9 on 2026-10-17 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0002_product_scrape_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("total_products", models.PositiveIntegerField(default=0)),
+                (
+                    "price_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=20),
+                ),
+                (
+                    "price_min",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                (
+                    "price_max",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=10, null=True
+                    ),
+                ),
+                ("rated_products", models.PositiveIntegerField(default=0)),
+                (
+                    "rating_total",
+                    models.DecimalField(decimal_places=1, default=0, max_digits=20),
+                ),
+                ("rating_distribution", models.JSONField(default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Product statistics",
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0003_productstats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="asin",
+            field=models.CharField(blank=True, max_length=10, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["rating", "price"], name="product_rating_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["source", "last_updated"], name="product_source_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-17 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0007_scrapejob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productanalysis",
+            name="content_hash",
+            field=models.CharField(blank=True, default="", max_length=40),
+        ),
+    ]
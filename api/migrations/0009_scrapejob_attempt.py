@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-17 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0008_productanalysis_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrapejob",
+            name="attempt",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
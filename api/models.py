@@ -7,12 +7,43 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField()
     rating = models.DecimalField(max_digits=3, decimal_places=1, null=True, blank=True)
+    url = models.URLField(max_length=1024, blank=True, db_index=True)
+    asin = models.CharField(max_length=10, unique=True, null=True, blank=True)  # Amazon product ID
+    source = models.CharField(max_length=50, default='amazon')
+    image_url = models.URLField(max_length=1024, blank=True, null=True)
+    last_updated = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.name} - ${self.price}"
     
     class Meta:
         ordering = ['-id']
+        indexes = [
+            models.Index(fields=['rating', 'price'], name='product_rating_price_idx'),
+            models.Index(fields=['source', 'last_updated'], name='product_source_updated_idx'),
+            # Keyset pagination for each sort key of the product list
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            models.Index(fields=['rating', 'id'], name='product_rating_id_idx'),
+            models.Index(fields=['last_updated', 'id'], name='product_updated_id_idx'),
+        ]
+
+class ProductStats(models.Model):
+    """Materialized snapshot of the product statistics, kept up to date on every product write."""
+    
+    total_products = models.PositiveIntegerField(default=0)
+    price_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    rated_products = models.PositiveIntegerField(default=0)
+    rating_total = models.DecimalField(max_digits=20, decimal_places=1, default=0)
+    rating_distribution = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Statistics for {self.total_products} products"
+    
+    class Meta:
+        verbose_name_plural = "Product statistics"
 
 class ProductAnalysis(models.Model):
     """Model to store AI-generated analysis of products."""
@@ -21,6 +52,8 @@ class ProductAnalysis(models.Model):
     summary = models.TextField()
     sentiment_score = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
     keywords = models.JSONField(default=dict)
+    # Digest of the product fields the analysis was built from
+    content_hash = models.CharField(max_length=40, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -44,3 +77,51 @@ class Insight(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+
+class ScrapeJob(models.Model):
+    """A queued scrape of Amazon categories, run by the scrape_worker command."""
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [QUEUED, RUNNING]
+    
+    categories = models.JSONField(default=list)
+    category_key = models.CharField(max_length=40)  # SHA-1 of the normalized categories and max age
+    max_products = models.PositiveIntegerField(default=100)
+    max_age_hours = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    links_found = models.PositiveIntegerField(default=0)
+    products_scraped = models.PositiveIntegerField(default=0)
+    products_added = models.PositiveIntegerField(default=0)
+    products_updated = models.PositiveIntegerField(default=0)
+    attempt = models.PositiveIntegerField(default=0)  # Incremented each time a worker claims the job
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Worker heartbeat while running
+    
+    def __str__(self):
+        return f"Scrape job {self.id} ({self.status})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='scrapejob_status_created_idx'),
+        ]
+        constraints = [
+            # At most one queued or running job per set of categories
+            models.UniqueConstraint(
+                fields=['category_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='scrapejob_one_active_per_categories'
+            ),
+        ]
@@ -0,0 +1,117 @@
+import json
+import base64
+import binascii
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from .models import Product
+
+# Sort keys accepted by the product list, each backed by a (column, id) index
+SORT_FIELDS = {
+    'id': 'id',
+    'price': 'price',
+    'rating': 'rating',
+    'updated': 'last_updated',
+}
+
+DEFAULT_SORT = '-id'
+
+def encode_cursor(position):
+    """Encode a keyset position (a dict of column values) as an opaque cursor."""
+    data = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    
+    if not isinstance(position, dict) or not isinstance(position.get('id'), int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return position
+
+def parse_sort(sort):
+    """Split a sort key such as '-price' into (column, descending), raising ValueError if unknown."""
+    sort = sort or DEFAULT_SORT
+    descending = sort.startswith('-')
+    column = SORT_FIELDS.get(sort.lstrip('-'))
+    if column is None:
+        raise ValueError(f"Invalid sort key: {sort}. Choose from {', '.join(SORT_FIELDS)}")
+    return column, descending
+
+def order_products(queryset, column, descending):
+    """Order products by `column` with the id as tie-breaker, NULLs last in both directions."""
+    id_order = '-id' if descending else 'id'
+    if column == 'id':
+        return queryset.order_by(id_order)
+    if Product._meta.get_field(column).null:
+        expression = F(column).desc(nulls_last=True) if descending else F(column).asc(nulls_last=True)
+        return queryset.order_by(expression, id_order)
+    return queryset.order_by(f'-{column}' if descending else column, id_order)
+
+def cursor_position(row, sort, column):
+    """Return the keyset position of a product `.values()` row in a list sorted by `sort`."""
+    position = {'id': row['id'], 'sort': sort}
+    if column != 'id':
+        value = row[column]
+        position['value'] = None if value is None else (
+            value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        )
+    return position
+
+def filter_after(queryset, position, sort, column, descending):
+    """Restrict an ordered queryset to the rows after a keyset position.
+    
+    The comparison is the row-value `(column, id) > (value, last id)` spelled
+    out with OR, plus a plain bound on the column so the planner answers it
+    with a range scan on the (column, id) index. A position with a value only
+    matches non-NULL values; one whose value is None is in the NULL tail and
+    matches the NULLs after its id (see keyset_querysets).
+    """
+    if position.get('sort', DEFAULT_SORT) != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    
+    id_after = Q(id__lt=position['id']) if descending else Q(id__gt=position['id'])
+    if column == 'id':
+        return queryset.filter(id_after)
+    
+    if 'value' not in position:
+        raise ValueError("Cursor is missing the sort value")
+    
+    field = Product._meta.get_field(column)
+    if position['value'] is None:
+        if not field.null:
+            raise ValueError("Cursor is missing the sort value")
+        return queryset.filter(Q(**{f'{column}__isnull': True}) & id_after)
+    
+    try:
+        value = field.to_python(position['value'])
+    except ValidationError:
+        raise ValueError(f"Invalid cursor value: {position['value']}")
+    
+    beyond, bound = (f'{column}__lt', f'{column}__lte') if descending else (f'{column}__gt', f'{column}__gte')
+    # The redundant bound lets the planner seek into the index instead of scanning from the start
+    return queryset.filter(Q(**{bound: value}) & (Q(**{beyond: value}) | (Q(**{column: value}) & id_after)))
+
+def keyset_querysets(queryset, position, sort, column, descending):
+    """Return the querysets that list the rows after a keyset position, in page order.
+    
+    `position` is None for the first page. A nullable column is paged in two
+    phases, the non-NULL values and then the NULL tail by id, because ORing
+    `IS NULL` into the range would stop the planner from seeking into the
+    (column, id) index. Callers read the phases in turn until a page is full.
+    """
+    if column == 'id' or not Product._meta.get_field(column).null:
+        products = order_products(queryset, column, descending)
+        return [products if position is None else filter_after(products, position, sort, column, descending)]
+    
+    id_order = '-id' if descending else 'id'
+    values = queryset.filter(**{f'{column}__isnull': False}).order_by(f'-{column}' if descending else column, id_order)
+    nulls = queryset.filter(**{f'{column}__isnull': True}).order_by(id_order)
+    if position is None:
+        return [values, nulls]
+    if position.get('value', '') is None:
+        return [filter_after(nulls, position, sort, column, descending)]
+    return [filter_after(values, position, sort, column, descending), nulls]
@@ -0,0 +1,67 @@
+import re
+from django.db import connection
+from django.db.models import Q
+from .models import Product
+
+# Words and numbers in a search query
+TERM_PATTERN = re.compile(r'\w+')
+
+# Must match the expression of the GIN index created in migration 0004
+POSTGRESQL_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+# Question words that carry no meaning for matching products
+STOP_WORDS = frozenset(
+    'a about an and any are as at be best can do does for from have how i in is it me '
+    'my of on or product products show that the there these this to under was what '
+    'when which who why will with you your'.split()
+)
+
+def search_products(query, limit=20, match_any=False):
+    """Return the products matching every term of `query`, most relevant first.
+    
+    SQLite ranks with BM25 over the FTS5 index and PostgreSQL with ts_rank over
+    the GIN tsvector index, both weighting the name above the description.
+    Other databases fall back to an unranked substring match. With
+    `match_any`, products matching any term are returned (still ranked, so
+    those matching more and rarer terms come first) and stop words are
+    ignored, which suits natural-language questions.
+    """
+    terms = TERM_PATTERN.findall(query.lower())
+    if match_any:
+        terms = list(dict.fromkeys(term for term in terms if term not in STOP_WORDS))
+    if not terms:
+        return []
+    operator = ' OR ' if match_any else ' '
+    
+    if connection.vendor == 'sqlite':
+        # Quote every term so FTS5 operators in user input are matched literally
+        sql = (
+            "SELECT rowid FROM api_product_fts WHERE api_product_fts MATCH %s "
+            "ORDER BY bm25(api_product_fts, 10.0, 1.0) LIMIT %s"
+        )
+        params = [operator.join(f'"{term}"' for term in terms), limit]
+    elif connection.vendor == 'postgresql':
+        # Terms are plain words, so joining them with & or | forms a valid tsquery
+        sql = (
+            f"SELECT id FROM api_product, to_tsquery('english', %s) query "
+            f"WHERE ({POSTGRESQL_SEARCH_VECTOR}) @@ query "
+            f"ORDER BY ts_rank({POSTGRESQL_SEARCH_VECTOR}, query) DESC LIMIT %s"
+        )
+        params = [(' | ' if match_any else ' & ').join(terms), limit]
+    else:
+        conditions = [Q(name__icontains=term) | Q(description__icontains=term) for term in terms]
+        combined = conditions[0]
+        for condition in conditions[1:]:
+            combined = (combined | condition) if match_any else (combined & condition)
+        return list(Product.objects.filter(combined)[:limit])
+    
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ids = [row[0] for row in cursor.fetchall()]
+    
+    # Fetch the rows in one query and restore the ranking order
+    products = Product.objects.in_bulk(ids)
+    return [products[product_id] for product_id in ids if product_id in products]
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .cache import bump_data_version
+from .models import Product
+from .stats import stat_values, update_product_stats
+
+# Bulk writes (bulk_create, bulk_update, QuerySet.update) send no signals: the
+# importer updates the snapshot and the data version itself, anything else must
+# call refresh_product_stats() and bump_data_version() afterwards.
+
+@receiver(pre_save, sender=Product)
+def remember_stat_values(sender, instance, **kwargs):
+    """Record the (price, rating) a saved product is about to overwrite."""
+    stored = None
+    if instance.pk is not None:
+        stored = Product.objects.filter(pk=instance.pk).only('price', 'rating').first()
+    instance._overwritten_stats = stat_values(stored) if stored else None
+
+@receiver(post_save, sender=Product)
+def update_stats_on_save(sender, instance, update_fields=None, **kwargs):
+    """Apply a single product save to the statistics snapshot."""
+    overwritten = getattr(instance, '_overwritten_stats', None)
+    written = stat_values(instance)
+    if update_fields is not None and overwritten:
+        # Fields left out of the save keep their stored value
+        written = (
+            written[0] if 'price' in update_fields else overwritten[0],
+            written[1] if 'rating' in update_fields else overwritten[1],
+        )
+    update_product_stats([written], [overwritten] if overwritten else [])
+
+@receiver(post_delete, sender=Product)
+def update_stats_on_delete(sender, instance, **kwargs):
+    """Remove a deleted product from the statistics snapshot."""
+    update_product_stats([], [stat_values(instance)])
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_cached_responses(sender, **kwargs):
+    """Expire cached responses and ETags built from the data before this write."""
+    # Bumping before the commit would let a concurrent request cache the old rows
+    # under the new version
+    transaction.on_commit(bump_data_version)
@@ -0,0 +1,115 @@
+import math
+from decimal import Decimal
+from django.db import transaction
+from django.db.backends.utils import format_number
+from django.db.models import Count, Sum, Min, Max, Q
+from .models import Product, ProductStats
+
+# Rating histogram buckets: "N stars" counts ratings in [N, N + 1)
+RATING_BUCKETS = range(1, 6)
+
+def _bucket_name(stars):
+    return f"{stars} stars"
+
+def _to_db_decimal(field_name, value):
+    """Convert a value the way the database stores it in a Product decimal field."""
+    if value is None:
+        return None
+    field = Product._meta.get_field(field_name)
+    return Decimal(format_number(field.to_python(value), field.max_digits, field.decimal_places))
+
+def stat_values(product):
+    """Return the (price, rating) a Product instance contributes to the statistics."""
+    return _to_db_decimal('price', product.price), _to_db_decimal('rating', product.rating)
+
+def refresh_product_stats():
+    """Recompute the statistics snapshot from scratch with a single aggregate query."""
+    buckets = {
+        f'rating_{stars}': Count('id', filter=Q(rating__gte=stars, rating__lt=stars + 1))
+        for stars in RATING_BUCKETS
+    }
+    totals = Product.objects.aggregate(
+        total_products=Count('id'),
+        price_total=Sum('price'),
+        price_min=Min('price'),
+        price_max=Max('price'),
+        rated_products=Count('rating'),
+        rating_total=Sum('rating'),
+        **buckets
+    )
+    
+    snapshot, _ = ProductStats.objects.update_or_create(pk=1, defaults={
+        'total_products': totals['total_products'],
+        'price_total': totals['price_total'] or 0,
+        'price_min': totals['price_min'],
+        'price_max': totals['price_max'],
+        'rated_products': totals['rated_products'],
+        'rating_total': totals['rating_total'] or 0,
+        'rating_distribution': {
+            _bucket_name(stars): totals[f'rating_{stars}'] for stars in RATING_BUCKETS
+        },
+    })
+    return snapshot
+
+@transaction.atomic
+def update_product_stats(added, removed):
+    """Apply an import to the statistics snapshot incrementally.
+    
+    `added` holds the (price, rating) pairs written by the import and `removed`
+    the pairs they overwrote. Sums and counts are adjusted in place; the
+    snapshot is only recomputed when a removed value was the current minimum or
+    maximum price and nothing added replaces it.
+    """
+    snapshot = ProductStats.objects.select_for_update().filter(pk=1).first()
+    if snapshot is None:
+        return refresh_product_stats()
+    
+    added_prices = [price for price, _ in added]
+    removed_prices = [price for price, _ in removed]
+    
+    if snapshot.price_min is not None and snapshot.price_min in removed_prices \
+            and not any(price <= snapshot.price_min for price in added_prices):
+        return refresh_product_stats()
+    if snapshot.price_max is not None and snapshot.price_max in removed_prices \
+            and not any(price >= snapshot.price_max for price in added_prices):
+        return refresh_product_stats()
+    
+    snapshot.total_products += len(added) - len(removed)
+    snapshot.price_total += sum(added_prices) - sum(removed_prices)
+    if added_prices:
+        snapshot.price_min = min(added_prices + [p for p in [snapshot.price_min] if p is not None])
+        snapshot.price_max = max(added_prices + [p for p in [snapshot.price_max] if p is not None])
+    
+    distribution = dict(snapshot.rating_distribution)
+    for pairs, sign in ((added, 1), (removed, -1)):
+        for _, rating in pairs:
+            if rating is None:
+                continue
+            snapshot.rated_products += sign
+            snapshot.rating_total += sign * rating
+            stars = math.floor(rating)
+            if stars in RATING_BUCKETS:
+                name = _bucket_name(stars)
+                distribution[name] = distribution.get(name, 0) + sign
+    snapshot.rating_distribution = distribution
+    
+    snapshot.save()
+    return snapshot
+
+def get_product_stats():
+    """Return the product statistics, read from the snapshot."""
+    snapshot = ProductStats.objects.filter(pk=1).first() or refresh_product_stats()
+    
+    return {
+        'total_products': snapshot.total_products,
+        'avg_price': snapshot.price_total / snapshot.total_products if snapshot.total_products else None,
+        'avg_rating': snapshot.rating_total / snapshot.rated_products if snapshot.rated_products else None,
+        'price_range': {
+            'min': snapshot.price_min,
+            'max': snapshot.price_max,
+        },
+        'rating_distribution': {
+            _bucket_name(stars): snapshot.rating_distribution.get(_bucket_name(stars), 0)
+            for stars in RATING_BUCKETS
+        }
+    }
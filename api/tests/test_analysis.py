@@ -0,0 +1,58 @@
+import io
+import pytest
+from django.core.management import call_command
+from django.db.models import F
+from api.analysis import products_needing_analysis, document_frequencies, local_analysis
+from api.models import Product
+from scraper.import_data import upsert_products
+
+pytestmark = pytest.mark.django_db
+
+PRODUCTS = [
+    {'name': f'Product {i}', 'url': f'https://www.amazon.com/dp/B00000000{i}', 'asin': f'B00000000{i}',
+     'price': 10 + i, 'rating': 4.0, 'description': f'A great product number {i}.'}
+    for i in range(3)
+]
+
+def analyze():
+    call_command('analyze_products', offline=True, stdout=io.StringIO())
+
+@pytest.fixture
+def analyzed_products():
+    upsert_products(PRODUCTS)
+    analyze()
+    assert products_needing_analysis() == []
+
+def test_unchanged_reimport_needs_no_analysis(analyzed_products):
+    upsert_products(PRODUCTS)
+    assert products_needing_analysis() == []
+    # Unchanged analyses are marked current, so the next run has no candidates
+    assert not Product.objects.filter(analysis__updated_at__lt=F('last_updated')).exists()
+
+def test_reimport_with_changed_fields_needs_analysis(analyzed_products):
+    upsert_products([dict(PRODUCTS[0], price=99), PRODUCTS[1], dict(PRODUCTS[2], description='Now slow and noisy.')])
+    changed = Product.objects.filter(asin__in=['B000000000', 'B000000002']).order_by('id')
+    assert products_needing_analysis() == list(changed.values_list('id', flat=True))
+
+    analyze()
+    assert products_needing_analysis() == []
+
+def test_new_products_need_analysis(analyzed_products):
+    upsert_products([dict(PRODUCTS[0], asin='B000000009', url='https://www.amazon.com/dp/B000000009')])
+    assert products_needing_analysis() == [Product.objects.get(asin='B000000009').id]
+
+def test_local_keywords_do_not_depend_on_the_batch():
+    upsert_products(PRODUCTS + [
+        {'name': 'Wireless mouse', 'url': 'https://www.amazon.com/dp/B000000009', 'asin': 'B000000009',
+         'price': 20, 'rating': 4.0, 'description': 'A great wireless mouse with a long battery.'},
+    ])
+    products = list(Product.objects.order_by('id'))
+    corpus = document_frequencies()
+
+    alone = local_analysis([products[-1]], corpus)[products[-1].id]
+    together = local_analysis(products, corpus)[products[-1].id]
+    assert alone == together
+    # Words shared with the rest of the catalog rank below the distinctive ones
+    assert alone['keywords']['wireless'] > 0
+    assert list(alone['keywords'])[0] in {'wireless', 'mouse', 'long', 'battery'}
+    assert alone['keywords'].get('great', 0) < alone['keywords']['wireless']
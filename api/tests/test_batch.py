@@ -0,0 +1,35 @@
+import pytest
+from rest_framework.test import APIClient
+from api.models import Product
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture
+def product():
+    return Product.objects.create(name='Laptop', url='https://example.com/laptop', price=799)
+
+def test_get_and_post_resolve_ids_in_order(product):
+    client = APIClient()
+    response = client.get('/api/products/batch/', {'ids': f'12345, {product.id}'})
+    assert [p['id'] for p in response.json()['results']] == [product.id]
+    assert response.json()['missing'] == [12345]
+
+    response = client.post('/api/products/batch/', {'ids': [product.id, str(product.id + 1)]}, format='json')
+    assert response.json()['missing'] == [product.id + 1]
+
+@pytest.mark.parametrize('ids', ['99999999999999999999999', '9223372036854775808', '0', '-1', '1.9', 'true', 'abc'])
+def test_get_rejects_invalid_ids(product, ids):
+    response = APIClient().get('/api/products/batch/', {'ids': ids})
+    assert response.status_code == 400
+    assert response.json()['error'] == 'ids must be integers'
+
+@pytest.mark.parametrize('value', [99999999999999999999999, 2 ** 63, 0, -1, 1.9, 1.0, True, None, '1.9', [1]])
+def test_post_rejects_invalid_ids(product, value):
+    response = APIClient().post('/api/products/batch/', {'ids': [value]}, format='json')
+    assert response.status_code == 400
+    assert response.json()['error'] == 'ids must be integers'
+
+def test_largest_id_is_accepted(product):
+    response = APIClient().get('/api/products/batch/', {'ids': str(2 ** 63 - 1)})
+    assert response.status_code == 200
+    assert response.json()['missing'] == [2 ** 63 - 1]
@@ -0,0 +1,51 @@
+import pytest
+from rest_framework.test import APIClient
+from api.models import Product
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture
+def products(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return [
+            Product.objects.create(name=f'Product {i}', url=f'https://example.com/p/{i}', price=10 + i)
+            for i in range(3)
+        ]
+
+@pytest.mark.parametrize('url', ['/api/products/', '/api/products/stats/'])
+def test_save_changes_etag_and_body(products, django_capture_on_commit_callbacks, url):
+    client = APIClient()
+    before = client.get(url)
+    assert client.get(url, HTTP_IF_NONE_MATCH=before['ETag']).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        products[0].name = 'Renamed'
+        products[0].price = 99
+        products[0].save()
+
+    after = client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+    assert after.status_code == 200
+    assert after['ETag'] != before['ETag']
+    assert after.content != before.content
+
+@pytest.mark.parametrize('url', ['/api/products/', '/api/products/stats/'])
+def test_delete_changes_etag_and_body(products, django_capture_on_commit_callbacks, url):
+    client = APIClient()
+    before = client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        products[1].delete()
+
+    after = client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+    assert after.status_code == 200
+    assert after['ETag'] != before['ETag']
+    assert after.content != before.content
+
+def test_version_is_only_bumped_on_commit(products, django_capture_on_commit_callbacks):
+    client = APIClient()
+    before = client.get('/api/products/')
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        products[0].save()
+        assert client.get('/api/products/', HTTP_IF_NONE_MATCH=before['ETag']).status_code == 304
+    assert callbacks
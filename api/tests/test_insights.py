@@ -0,0 +1,150 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from api import llm
+from api.answers import AnswerCache
+from api.models import Product
+from api.views import InsightsView
+
+pytestmark = pytest.mark.django_db
+
+class FakeCompletions(BaseHTTPRequestHandler):
+    """A chat completions endpoint that answers with a fixed list of tokens.
+
+    Questions containing "fail" get a 400 error. A streamed answer waits for
+    `release` after its first token, so a test can check that the token
+    reached the client while the model was still "generating".
+    """
+    protocol_version = 'HTTP/1.1'
+    tokens = ['Good ', 'value ', 'for ', 'money.']
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server.calls.append(self.client_address)
+
+        if 'fail' in request['messages'][-1]['content']:
+            return self.send_json(400, {'error': {'message': 'model is overloaded', 'type': 'invalid_request_error'}})
+
+        if not request.get('stream'):
+            return self.send_json(200, {
+                'id': 'cmpl', 'object': 'chat.completion', 'created': 0, 'model': request['model'],
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': ''.join(self.tokens)}}],
+            })
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, token in enumerate(self.tokens):
+            chunk = {
+                'id': 'cmpl', 'object': 'chat.completion.chunk', 'created': 0, 'model': request['model'],
+                'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}],
+            }
+            self.send_chunk(f"data: {json.dumps(chunk)}\n\n")
+            if i == 0:
+                server.released_in_time = server.release.wait(timeout=5)
+        self.send_chunk("data: [DONE]\n\n")
+        self.send_chunk("")
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+@pytest.fixture
+def fake_llm(settings, monkeypatch):
+    """Point the insights view at an in-process fake completions server."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCompletions)
+    server.calls = []
+    server.release = threading.Event()
+    server.released_in_time = None
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+
+    settings.OPENAI_BASE_URL = f'http://127.0.0.1:{server.server_port}/v1'
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+    monkeypatch.setattr(llm, '_clients', {})
+    monkeypatch.setattr(InsightsView, 'answer_cache', AnswerCache())
+    yield server
+
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def product():
+    return Product.objects.create(name='Laptop', url='https://example.com/laptop', price=799, rating=4.5)
+
+def ask(client, question, product, stream=False):
+    return client.post('/api/insights/', json.dumps({
+        'question': question, 'product_id': product.id, 'stream': stream
+    }), content_type='application/json')
+
+def read_events(chunks):
+    """Parse Server-Sent Events from the chunks of a streaming response."""
+    events = []
+    for chunk in chunks:
+        for block in chunk.decode('utf-8').split('\n\n'):
+            if block:
+                name, data = block.split('\n')
+                events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+def test_client_is_reused_across_requests(client, fake_llm, product):
+    assert ask(client, 'Is it fast?', product).json()['status'] == 'success'
+    first_client = llm.get_llm_client('test-key')
+    assert ask(client, 'Is it light?', product).json()['status'] == 'success'
+
+    assert llm.get_llm_client('test-key') is first_client
+    assert len(llm._clients) == 1
+    # Both calls came over the same keep-alive connection
+    assert len(fake_llm.calls) == 2 and fake_llm.calls[0] == fake_llm.calls[1]
+
+def test_stream_emits_tokens_as_they_are_generated(client, fake_llm, product):
+    response = ask(client, 'Is it good value?', product, stream=True)
+    assert response['Content-Type'] == 'text/event-stream'
+    chunks = iter(response.streaming_content)
+
+    # The first token arrives while the server still holds back the rest
+    assert read_events([next(chunks)]) == [('token', {'token': 'Good '})]
+    fake_llm.release.set()
+    events = read_events(chunks)
+
+    assert fake_llm.released_in_time
+    assert events == [('token', {'token': token}) for token in FakeCompletions.tokens[1:]] + [
+        ('done', {'status': 'success', 'provider': 'openai', 'cached': False})
+    ]
+
+def test_stream_reports_errors_as_an_event(client, fake_llm, product):
+    events = read_events(ask(client, 'Will it fail?', product, stream=True).streaming_content)
+
+    assert [name for name, _ in events] == ['error']
+    assert events[0][1]['status'] == 'error'
+    assert 'model is overloaded' in events[0][1]['error']
+    # Failed answers are not cached
+    assert InsightsView.answer_cache.get('Will it fail?', str(product.id)) is None
+
+def test_streamed_answer_is_cached_on_success(client, fake_llm, product):
+    fake_llm.release.set()
+    read_events(ask(client, 'Is it good value?', product, stream=True).streaming_content)
+    assert len(fake_llm.calls) == 1
+
+    response = ask(client, 'is it good value', product).json()
+    assert response == {'answer': 'Good value for money.', 'status': 'success', 'provider': 'openai', 'cached': True}
+    events = read_events(ask(client, 'Is it good value?', product, stream=True).streaming_content)
+    assert events[-1] == ('done', {'status': 'success', 'provider': 'openai', 'cached': True})
+    assert len(fake_llm.calls) == 1
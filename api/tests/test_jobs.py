@@ -0,0 +1,104 @@
+import os
+import json
+import pytest
+from api import analysis, jobs
+from api.jobs import enqueue_scrape_job, claim_next_job, requeue_stale_jobs, run_scrape_job
+from api.models import Product, ScrapeJob
+from scraper.scraper import EcommerceScraper
+
+pytestmark = pytest.mark.django_db
+
+def test_requests_for_the_same_scrape_coalesce():
+    job, created = enqueue_scrape_job(['Laptops', 'headphones '], 50, max_age_hours=24)
+    same, coalesced = enqueue_scrape_job(['headphones', 'laptops'], 100, max_age_hours=24.0)
+
+    assert created and not coalesced
+    assert same.id == job.id and same.max_products == 100
+
+def test_max_age_is_part_of_the_coalescing_decision():
+    incremental, _ = enqueue_scrape_job(['laptops'], 50, max_age_hours=24)
+    full, full_created = enqueue_scrape_job(['laptops'], 50)
+    fresher, fresher_created = enqueue_scrape_job(['laptops'], 50, max_age_hours=1)
+
+    assert full_created and fresher_created
+    assert len({incremental.id, full.id, fresher.id}) == 3
+
+@pytest.fixture
+def scrape_output(settings, tmp_path, monkeypatch):
+    """Replace the scrape with writing `scrape_output.text` as the job's product file."""
+    settings.SCRAPER_CACHE_DIR = str(tmp_path / 'page_cache')
+    settings.OPENAI_API_KEY = ''
+    monkeypatch.setattr(jobs, 'JOB_OUTPUT_DIR', str(tmp_path / 'jobs'))
+
+    class Output:
+        text = '[]'
+
+    def scrape_products(self, urls, max_products=100, known_products=None, max_age=None, progress=None):
+        progress(links_found=1, products_scraped=1)
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, 'amazon_products.json'), 'w', encoding='utf-8') as f:
+            f.write(Output.text)
+
+    monkeypatch.setattr(EcommerceScraper, 'scrape_products', scrape_products)
+    return Output
+
+def run_next_job():
+    return run_scrape_job(claim_next_job(), delay=0)
+
+def test_successful_job_imports_and_analyzes(scrape_output):
+    scrape_output.text = json.dumps([
+        {'name': 'Laptop', 'url': 'https://www.amazon.com/dp/B000000001', 'price': 799, 'rating': 4.5,
+         'description': 'A fast and light laptop.'},
+    ])
+    enqueue_scrape_job(['laptops'], 10)
+    job = run_next_job()
+
+    assert job.status == ScrapeJob.SUCCEEDED
+    assert job.products_added == 1
+    assert Product.objects.get(asin='B000000001').analysis.summary == 'A fast and light laptop.'
+
+def test_failed_import_fails_the_job(scrape_output):
+    scrape_output.text = '[{"name": "Laptop", "url": '
+    enqueue_scrape_job(['laptops'], 10)
+    job = run_next_job()
+
+    assert job.status == ScrapeJob.FAILED
+    assert job.error
+    assert job.finished_at is not None
+
+def take_over(job):
+    """Requeue a running job as stale and claim it again, as a second worker would."""
+    assert requeue_stale_jobs(stale_after=-1) == 1
+    claimed = claim_next_job()
+    assert claimed.id == job.id and claimed.attempt == job.attempt + 1
+    return claimed
+
+def test_attempts_write_separate_output(scrape_output, tmp_path):
+    enqueue_scrape_job(['laptops'], 10)
+    first = claim_next_job()
+    second = take_over(first)
+
+    # The first worker stops at its next heartbeat and leaves the job alone
+    assert run_scrape_job(first, delay=0).status == ScrapeJob.RUNNING
+    assert not (tmp_path / 'jobs' / str(first.id) / '1' / 'amazon_products.json').exists()
+
+    job = run_scrape_job(second, delay=0)
+    assert job.status == ScrapeJob.SUCCEEDED and job.attempt == 2
+    assert (tmp_path / 'jobs' / str(job.id) / '2' / 'amazon_products.json').exists()
+
+def test_job_taken_over_during_analysis_is_not_finished_by_the_first_worker(scrape_output, monkeypatch):
+    scrape_output.text = json.dumps([{'name': 'Laptop', 'url': 'https://www.amazon.com/dp/B000000001', 'price': 1}])
+    enqueue_scrape_job(['laptops'], 10)
+    first = claim_next_job()
+    analyze_products = analysis.analyze_products
+
+    def slow_analysis(ids, **kwargs):
+        # Another worker claims the job while the analysis is still running
+        take_over(first)
+        return analyze_products(ids, **kwargs)
+
+    monkeypatch.setattr(analysis, 'analyze_products', slow_analysis)
+    job = run_scrape_job(first, delay=0)
+
+    assert job.status == ScrapeJob.RUNNING and job.attempt == 2
+    assert job.finished_at is None
@@ -0,0 +1,32 @@
+import pytest
+from rest_framework.test import APIClient
+from api.models import Product
+from api.pagination import SORT_FIELDS, order_products
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture
+def products():
+    ratings = [4.5, None, 3.0, 4.5, None, 1.0, 4.5, None, 5.0, 3.0, None, 2.5]
+    Product.objects.bulk_create([
+        Product(name=f'Product {i}', url=f'https://example.com/p/{i}', price=(i * 7) % 5, rating=rating)
+        for i, rating in enumerate(ratings)
+    ])
+
+def walk_cursor_pages(client, sort, page_size):
+    """Return the ids listed by following `next` from the first cursor page."""
+    ids = []
+    url = f'/api/products/?cursor=&sort={sort}&page_size={page_size}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        ids += [product['id'] for product in response.json()['results']]
+        url = response.json()['next']
+    return ids
+
+@pytest.mark.parametrize('sort', [prefix + key for key in SORT_FIELDS for prefix in ('', '-')])
+@pytest.mark.parametrize('page_size', [1, 2, 3, 5, 50])
+def test_cursor_pages_list_every_product_in_order(products, sort, page_size):
+    column, descending = SORT_FIELDS[sort.lstrip('-')], sort.startswith('-')
+    expected = list(order_products(Product.objects.all(), column, descending).values_list('id', flat=True))
+    assert walk_cursor_pages(APIClient(), sort, page_size) == expected
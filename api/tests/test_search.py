@@ -0,0 +1,21 @@
+import pytest
+from rest_framework.test import APIClient
+from api.models import Product
+
+pytestmark = pytest.mark.django_db
+
+@pytest.fixture
+def laptops():
+    for i in range(3):
+        Product.objects.create(name=f'Laptop {i}', url=f'https://example.com/laptop/{i}', price=500 + i,
+                               description='A light laptop')
+
+@pytest.mark.parametrize('limit, expected', [('2', 2), ('500', 3), ('0', 1), ('-1', 1)])
+def test_limit_is_clamped(laptops, limit, expected):
+    response = APIClient().get('/api/products/search/', {'q': 'laptop', 'limit': limit})
+    assert response.status_code == 200
+    assert response.json()['count'] == expected
+
+def test_invalid_limit(laptops):
+    response = APIClient().get('/api/products/search/', {'q': 'laptop', 'limit': 'all'})
+    assert response.status_code == 400
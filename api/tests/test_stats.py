@@ -0,0 +1,68 @@
+import pytest
+from api.models import Product, ProductStats
+from api.stats import refresh_product_stats
+from scraper.import_data import upsert_products
+
+pytestmark = pytest.mark.django_db
+
+STAT_FIELDS = [
+    'total_products', 'price_total', 'price_min', 'price_max',
+    'rated_products', 'rating_total', 'rating_distribution',
+]
+
+def snapshot_values():
+    snapshot = ProductStats.objects.get(pk=1)
+    return {field: getattr(snapshot, field) for field in STAT_FIELDS}
+
+def assert_matches_refresh():
+    """The incrementally maintained snapshot equals one recomputed from the table."""
+    incremental = snapshot_values()
+    refresh_product_stats()
+    assert incremental == snapshot_values()
+
+def import_product(asin, price, rating):
+    upsert_products([{
+        'name': f'Product {asin}', 'url': f'https://www.amazon.com/dp/{asin}',
+        'asin': asin, 'price': price, 'rating': rating,
+    }])
+
+@pytest.fixture
+def products():
+    refresh_product_stats()
+    import_product('B000000001', 10, 4.5)
+    import_product('B000000002', 25.5, 3.0)
+    import_product('B000000003', 99.99, None)
+    assert_matches_refresh()
+
+def test_import_add_and_overwrite(products):
+    import_product('B000000004', 5, 1.2)
+    assert_matches_refresh()
+    import_product('B000000002', 30, 4.9)
+    assert_matches_refresh()
+
+def test_import_overwrites_min_and_max_price(products):
+    import_product('B000000001', 50, 2.0)
+    assert_matches_refresh()
+    import_product('B000000003', 60, 5.0)
+    assert_matches_refresh()
+
+def test_create_and_save_outside_the_importer(products):
+    product = Product.objects.create(name='Manual', url='https://example.com/manual', price=1, rating=2.5)
+    assert_matches_refresh()
+    product.price = 500
+    product.rating = None
+    product.save()
+    assert_matches_refresh()
+    product.price = 20
+    product.rating = 4.0
+    product.save(update_fields=['price'])
+    assert_matches_refresh()
+
+def test_delete_outside_the_importer(products):
+    Product.objects.get(asin='B000000003').delete()
+    assert_matches_refresh()
+    Product.objects.filter(asin='B000000001').delete()
+    assert_matches_refresh()
+    assert snapshot_values()['total_products'] == 1
+    Product.objects.all().delete()
+    assert_matches_refresh()
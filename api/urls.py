@@ -1,13 +1,21 @@
 from django.urls import path
-from .views import ProductListView, ProductDetailView, ScraperView, InsightsView
+from .views import (
+    ProductListView, ProductDetailView, ProductBatchView, ProductExportView,
+    ProductSearchView, ProductStatsView, ScraperView, ScrapeJobView, InsightsView
+)
 
 urlpatterns = [
     # API endpoints for products
     path('products/', ProductListView.as_view(), name='product-list'),
     path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
+    path('products/batch/', ProductBatchView.as_view(), name='product-batch'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/stats/', ProductStatsView.as_view(), name='product-stats'),
+    path('products/search/', ProductSearchView.as_view(), name='product-search'),
     
     # Scraper endpoint
     path('scrape/', ScraperView.as_view(), name='scrape'),
+    path('scrape/<int:pk>/', ScrapeJobView.as_view(), name='scrape-job'),
     
     # Insights endpoint
     path('insights/', InsightsView.as_view(), name='insights'),
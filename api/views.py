@@ -1,17 +1,31 @@
 import os
+import re
 import json
 import logging
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from openai import OpenAI
+from django.utils.cache import patch_vary_headers
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .models import Product
-from .serializers import ProductSerializer, ProductDetailSerializer
-from scraper.scraper import EcommerceScraper
+from .models import Product, ScrapeJob
+from .serializers import (
+    ProductSerializer, ProductDetailSerializer, PRODUCT_LIST_FIELDS, serialize_product_values
+)
+from .pagination import (
+    DEFAULT_SORT, encode_cursor, decode_cursor, parse_sort, order_products, cursor_position, keyset_querysets
+)
+from .filters import ProductFilter
+from .cache import get_product_count, cached_response
+from .stats import get_product_stats
+from .search import search_products
+from .answers import AnswerCache, pack_context, sse_event
+from .llm import get_llm_client
+from .jobs import enqueue_scrape_job, job_status, normalize_categories
+from .export import EXPORT_FIELDS, EXPORT_CHUNK_SIZE, iter_ndjson, iter_csv, gzip_stream
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
@@ -26,32 +40,53 @@ from django.shortcuts import get_object_or_404
 class ProductListView(APIView):
     """API view for listing products."""
     
+    @cached_response
     def get(self, request):
-        """Get a list of products with pagination."""
+        """Get a filtered, sorted list of products with page or cursor pagination.
+        
+        Filters are declared on ProductFilter and `sort` takes one of the keys
+        in SORT_FIELDS, prefixed with '-' for descending order. Passing
+        `cursor` (empty for the first page) switches to keyset pagination:
+        each page continues from the (sort value, id) of the previous one, so
+        deep pages cost the same as the first one. `count=estimate` reports
+        the planner's row estimate on PostgreSQL instead of an exact count.
+        """
         try:
             # Get pagination parameters
             page = int(request.query_params.get('page', 1))
             page_size = int(request.query_params.get('page_size', 20))
+            cursor = request.query_params.get('cursor')
+            sort = request.query_params.get('sort') or DEFAULT_SORT
+            column, descending = parse_sort(sort)
+            
+            filterset = ProductFilter(request.query_params, queryset=Product.objects.all())
+            if not filterset.is_valid():
+                return Response({
+                    'error': 'Invalid filter parameters',
+                    'detail': filterset.errors
+                }, status=400)
+            
+            if cursor is not None:
+                return self._get_cursor_page(request, filterset.qs, cursor, page_size, sort, column, descending)
             
-            # Get all products
-            products = Product.objects.all().order_by('-id')
+            products = order_products(filterset.qs, column, descending)
             
             # Calculate pagination
             start = (page - 1) * page_size
             end = start + page_size
             
-            # Get paginated products
-            paginated_products = products[start:end]
+            # Fetch and serialize only the listed columns
+            results = serialize_product_values(list(products.values(*PRODUCT_LIST_FIELDS)[start:end]))
             
-            # Serialize the products
-            serializer = ProductSerializer(paginated_products, many=True)
+            # Count once per request, served from the cache between imports
+            count = get_product_count(products, estimate=request.query_params.get('count') == 'estimate')
             
             # Prepare response with pagination info
             return Response({
-                'count': products.count(),
-                'next': f'/api/products/?page={page+1}&page_size={page_size}' if end < products.count() else None,
-                'previous': f'/api/products/?page={page-1}&page_size={page_size}' if page > 1 else None,
-                'results': serializer.data
+                'count': count,
+                'next': self._page_url(request, page=page + 1) if end < count else None,
+                'previous': self._page_url(request, page=page - 1) if page > 1 else None,
+                'results': results
             })
             
         except ValueError as e:
@@ -65,57 +100,222 @@ class ProductListView(APIView):
                 'error': 'Internal server error',
                 'detail': str(e)
             }, status=500)
+    
+    def _get_cursor_page(self, request, queryset, cursor, page_size, sort, column, descending):
+        """Return the page of products after the position encoded in `cursor`."""
+        if page_size < 1:
+            raise ValueError("page_size must be a positive number")
+        
+        position = decode_cursor(cursor) if cursor else None
+        
+        # The sort column is needed for the next cursor even when it is not listed
+        fields = PRODUCT_LIST_FIELDS if column in PRODUCT_LIST_FIELDS else PRODUCT_LIST_FIELDS + [column]
+        
+        # Fetch one extra row to know whether there is a next page, moving on
+        # to the NULL tail once the non-NULL values run out
+        rows = []
+        for products in keyset_querysets(queryset, position, sort, column, descending):
+            rows += products.values(*fields)[:page_size + 1 - len(rows)]
+            if len(rows) > page_size:
+                break
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        
+        next_url = None
+        if has_next:
+            next_cursor = encode_cursor(cursor_position(rows[-1], sort, column))
+            next_url = self._page_url(request, cursor=next_cursor)
+        
+        if column not in PRODUCT_LIST_FIELDS:
+            for row in rows:
+                del row[column]
+        
+        return Response({
+            'next': next_url,
+            'results': serialize_product_values(rows)
+        })
+    
+    def _page_url(self, request, **params):
+        """Return the list URL for another page, keeping the filters and sort of this request."""
+        query = request.query_params.copy()
+        for key, value in params.items():
+            query[key] = value
+        return f'/api/products/?{query.urlencode()}'
 
 class ProductDetailView(APIView):
     """API view for retrieving product details."""
     
+    @cached_response
     def get(self, request, pk):
         """Get detailed information about a specific product."""
         product = get_object_or_404(Product, pk=pk)
         serializer = ProductDetailSerializer(product)
         return Response(serializer.data)
 
+class ProductBatchView(APIView):
+    """API view for looking up many products by ID in one request."""
+    
+    # Upper bound on the IDs resolved per request
+    MAX_IDS = 500
+    # Largest value a 64-bit primary key can hold
+    MAX_PRODUCT_ID = 2 ** 63 - 1
+    
+    @cached_response
+    def get(self, request):
+        """Get the products listed in `ids`, a comma-separated list of IDs."""
+        ids = [value for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        return self._get_products(ids)
+    
+    def post(self, request):
+        """Get the products listed in the `ids` array of the request body."""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list):
+            return Response({
+                'error': 'Request body must be an object with an "ids" array'
+            }, status=400)
+        return self._get_products(ids)
+    
+    def _parse_id(self, value):
+        """Return the product ID in a JSON integer or a string of digits, raising ValueError otherwise."""
+        # bool is an int subclass, and floats such as 1.9 would be truncated
+        if isinstance(value, str) and re.fullmatch(r'\s*[0-9]+\s*', value):
+            product_id = int(value)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            product_id = value
+        else:
+            raise ValueError(f"Invalid id: {value!r}")
+        
+        if not 1 <= product_id <= self.MAX_PRODUCT_ID:
+            raise ValueError(f"Id out of range: {value!r}")
+        return product_id
+    
+    def _get_products(self, ids):
+        """Resolve the IDs with one query, in request order, reporting the missing ones."""
+        try:
+            ids = [self._parse_id(product_id) for product_id in ids]
+        except ValueError as e:
+            return Response({
+                'error': 'ids must be integers',
+                'detail': str(e)
+            }, status=400)
+        
+        if not ids:
+            return Response({
+                'error': 'No ids provided'
+            }, status=400)
+        
+        # Drop repeated IDs, keeping the first occurrence
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > self.MAX_IDS:
+            return Response({
+                'error': f'At most {self.MAX_IDS} ids can be requested at once'
+            }, status=400)
+        
+        products = Product.objects.in_bulk(ids)
+        serializer = ProductDetailSerializer(
+            [products[product_id] for product_id in ids if product_id in products], many=True
+        )
+        return Response({
+            'results': serializer.data,
+            'missing': [product_id for product_id in ids if product_id not in products]
+        })
+
+class ProductSearchView(APIView):
+    """API view for full-text product search."""
+    
+    @cached_response
+    def get(self, request):
+        """Search products by name and description, most relevant first."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                'error': 'No search query provided'
+            }, status=400)
+        
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError as e:
+            return Response({
+                'error': 'Invalid limit',
+                'detail': str(e)
+            }, status=400)
+        
+        products = search_products(query, limit=limit)
+        serializer = ProductSerializer(products, many=True)
+        return Response({
+            'count': len(products),
+            'results': serializer.data
+        })
+
+class ProductExportView(View):
+    """View streaming the whole product catalog in one response."""
+    
+    CONTENT_TYPES = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+    
+    def get(self, request):
+        """Stream every product (or those matching the list filters) as NDJSON or CSV.
+        
+        Rows are read with a chunked iterator and written chunk by chunk, so
+        server memory stays constant however large the catalog is. Clients
+        sending `Accept-Encoding: gzip` get the stream compressed on the fly.
+        """
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in self.CONTENT_TYPES:
+            return JsonResponse({
+                'error': f'format must be one of: {", ".join(self.CONTENT_TYPES)}',
+                'status': 'error'
+            }, status=400)
+        
+        filterset = ProductFilter(request.GET, queryset=Product.objects.order_by('id'))
+        if not filterset.is_valid():
+            return JsonResponse({
+                'error': 'Invalid filter parameters',
+                'detail': filterset.errors,
+                'status': 'error'
+            }, status=400)
+        
+        rows = filterset.qs.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        content = iter_csv(rows) if export_format == 'csv' else iter_ndjson(rows)
+        
+        response = StreamingHttpResponse(content_type=self.CONTENT_TYPES[export_format])
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            content = gzip_stream(content)
+            response['Content-Encoding'] = 'gzip'
+        response.streaming_content = content
+        response['Content-Disposition'] = f'attachment; filename="products.{export_format}"'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        
+        logger.info(f"Streaming product export as {export_format}")
+        return response
+
 class ProductStatsView(APIView):
     """
     API endpoint for product statistics.
     """
     
+    @cached_response
     def get(self, request, format=None):
-        """Return product statistics."""
-        stats = {
-            'total_products': Product.objects.count(),
-            'avg_price': Product.objects.aggregate(Avg('price'))['price__avg'],
-            'avg_rating': Product.objects.aggregate(Avg('rating'))['rating__avg'],
-            'price_range': {
-                'min': Product.objects.aggregate(Min('price'))['price__min'],
-                'max': Product.objects.aggregate(Max('price'))['price__max'],
-            },
-            'rating_distribution': self._get_rating_distribution()
-        }
-        return Response(stats)
-    
-    def _get_rating_distribution(self):
-        """Get the distribution of product ratings."""
-        distribution = {}
-        for i in range(1, 6):  # Ratings 1-5
-            count = Product.objects.filter(rating__gte=i, rating__lt=i+1).count()
-            distribution[f"{i} stars"] = count
-        return distribution
+        """Return product statistics from the precomputed snapshot."""
+        return Response(get_product_stats())
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ScraperView(View):
     """View for triggering the Amazon product scraper."""
     
     def post(self, request):
-        """Start a scraping job for Amazon products."""
+        """Queue a scraping job for Amazon products and return its ID right away."""
         try:
             # Parse JSON data from the request
             data = json.loads(request.body)
             categories = data.get('categories', [])  # Now expecting category names
             max_products = data.get('max_products', 100)
+            max_age_hours = data.get('max_age_hours')  # Only refresh products older than this
             
             # Validate parameters
-            if not categories:
+            if not isinstance(categories, list) or not normalize_categories(categories):
                 return JsonResponse({
                     'error': 'No categories provided',
                     'status': 'error'
@@ -138,37 +338,30 @@ class ScraperView(View):
                     'status': 'error'
                 }, status=400)
             
-            # Build Amazon search URLs from categories
-            category_urls = []
-            for category in categories:
-                # Replace spaces with plus signs for URL formatting
-                formatted_category = category.strip().replace(' ', '+')
-                amazon_url = f"https://www.amazon.com/s?k={formatted_category}"
-                category_urls.append(amazon_url)
-            
-            logger.info(f"Starting Amazon scraper for categories: {', '.join(categories)}, max_products={max_products}")
-            
-            # Initialize scraper for Amazon
-            scraper = EcommerceScraper(
-                base_url='https://www.amazon.com',
-                output_dir='data',
-                delay=2
-            )
-            
-            # Execute the scraper
-            products = scraper.scrape_products(category_urls, max_products=max_products)
+            # Validate max_age_hours
+            if max_age_hours is not None:
+                try:
+                    max_age_hours = float(max_age_hours)
+                except (ValueError, TypeError):
+                    return JsonResponse({
+                        'error': 'max_age_hours must be a valid number',
+                        'status': 'error'
+                    }, status=400)
             
-            # Import the data using the import script
-            from scraper.import_data import import_amazon_data
-            products_added, products_updated = import_amazon_data()
+            # Queue the job; a worker process runs it (manage.py scrape_worker)
+            job, created = enqueue_scrape_job(categories, max_products, max_age_hours)
+            if created:
+                logger.info(f"Queued scrape job {job.id} for categories: {', '.join(job.categories)}, max_products={max_products}")
+            else:
+                logger.info(f"Coalesced scrape request for {', '.join(job.categories)} into job {job.id}")
             
+            state = 'queued' if created else f'already {job.status}'
             return JsonResponse({
                 'status': 'success',
-                'message': f'Scraping completed. Added {products_added} products, updated {products_updated} products.',
-                'products_found': len(products),
-                'max_products': max_products,
-                'categories': categories
-            })
+                'message': f'Scrape job {job.id} {state}. Poll /api/scrape/{job.id}/ for progress.',
+                'coalesced': not created,
+                'job': job_status(job)
+            }, status=202)
             
         except Exception as e:
             logger.error(f"Error in scraper view: {str(e)}")
@@ -177,10 +370,30 @@ class ScraperView(View):
                 'status': 'error'
             }, status=500)
 
+class ScrapeJobView(View):
+    """View reporting the progress of a scrape job."""
+    
+    def get(self, request, pk):
+        """Return the status and progress counters of a scrape job."""
+        job = ScrapeJob.objects.filter(pk=pk).first()
+        if job is None:
+            return JsonResponse({
+                'error': f'Scrape job {pk} not found',
+                'status': 'error'
+            }, status=404)
+        return JsonResponse(job_status(job))
+
 @method_decorator(csrf_exempt, name='dispatch')
 class InsightsView(View):
     """View for providing AI-powered insights about products."""
     
+    # Shared by every request this process serves
+    answer_cache = AnswerCache(
+        max_entries=settings.INSIGHTS_CACHE_MAX_ENTRIES,
+        ttl=settings.INSIGHTS_CACHE_TTL,
+        similarity=settings.INSIGHTS_CACHE_SIMILARITY or None
+    )
+    
     def get_api_key(self):
         """Get the OpenAI API key from environment variables."""
         api_key = os.environ.get('OPENAI_API_KEY')
@@ -189,6 +402,40 @@ class InsightsView(View):
             return None
         return api_key
     
+    def build_messages(self, question, product=None):
+        """Build the chat messages asking `question` with product data as context."""
+        if product:
+            # Format product data as context
+            context = (
+                f"Product: {product.name}\n"
+                f"Price: ${product.price}\n"
+                f"Rating: {product.rating}/5\n"
+                f"Description: {product.description}\n"
+            )
+            
+            # Add the precomputed analysis, fetched with the product in one join
+            analysis = getattr(product, 'analysis', None)
+            if analysis is not None:
+                context += (
+                    f"Summary: {analysis.summary}\n"
+                    f"Sentiment: {analysis.sentiment_score} (-1 to 1)\n"
+                    f"Keywords: {', '.join(analysis.keywords)}\n"
+                )
+            prompt = f"Based on this product information:\n\n{context}\n\nQuestion: {question}\n\nAnswer:"
+        else:
+            # General question: pick the products most relevant to it from the search index
+            products = search_products(question, limit=settings.INSIGHTS_CONTEXT_PRODUCTS, match_any=True)
+            if not products:
+                products = Product.objects.all()[:settings.INSIGHTS_CONTEXT_PRODUCTS]
+            context = "Products in the database:\n\n" + pack_context(products, settings.INSIGHTS_CONTEXT_TOKENS)
+            
+            prompt = f"Based on these products:\n\n{context}\n\nQuestion: {question}\n\nAnswer:"
+        
+        return [
+            {"role": "system", "content": "You are a helpful e-commerce assistant that provides insights about products."},
+            {"role": "user", "content": prompt}
+        ]
+    
     def generate_answer(self, question, product=None):
         """Generate an AI answer using OpenAI."""
         api_key = self.get_api_key()
@@ -199,33 +446,10 @@ class InsightsView(View):
             }
         
         try:
-            client = OpenAI(api_key=api_key)
-            
-            if product:
-                # Format product data as context
-                context = (
-                    f"Product: {product.name}\n"
-                    f"Price: ${product.price}\n"
-                    f"Rating: {product.rating}/5\n"
-                    f"Description: {product.description}\n"
-                )
-                prompt = f"Based on this product information:\n\n{context}\n\nQuestion: {question}\n\nAnswer:"
-            else:
-                # General question about products in the database
-                products = Product.objects.all()[:5]  # Limit to 5 products for context
-                context = "Products in the database:\n\n"
-                for p in products:
-                    context += f"- {p.name} (${p.price}): {p.description[:100]}...\n"
-                
-                prompt = f"Based on these products:\n\n{context}\n\nQuestion: {question}\n\nAnswer:"
-            
             # Call OpenAI API
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful e-commerce assistant that provides insights about products."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = get_llm_client(api_key).chat.completions.create(
+                model=settings.INSIGHTS_MODEL,
+                messages=self.build_messages(question, product),
                 temperature=0.7,
                 max_tokens=400
             )
@@ -245,12 +469,65 @@ class InsightsView(View):
                 'status': 'error'
             }
     
+    def stream_answer(self, question, product=None, cache_product_id=None):
+        """Yield Server-Sent Events forwarding the answer's tokens as the model generates them.
+        
+        Each `token` event carries the next piece of the answer and a final
+        `done` (or `error`) event closes the stream. The complete answer is
+        added to the answer cache.
+        """
+        api_key = self.get_api_key()
+        if not api_key:
+            yield sse_event('error', {'error': 'OpenAI API key not configured.', 'status': 'error'})
+            return
+        
+        try:
+            stream = get_llm_client(api_key).chat.completions.create(
+                model=settings.INSIGHTS_MODEL,
+                messages=self.build_messages(question, product),
+                temperature=0.7,
+                max_tokens=400,
+                stream=True
+            )
+            
+            tokens = []
+            for chunk in stream:
+                token = chunk.choices[0].delta.content if chunk.choices else None
+                if token:
+                    tokens.append(token)
+                    yield sse_event('token', {'token': token})
+            
+            result = {
+                'answer': ''.join(tokens).strip(),
+                'status': 'success',
+                'provider': 'openai'
+            }
+            self.answer_cache.set(question, result, cache_product_id)
+            yield sse_event('done', {'status': 'success', 'provider': 'openai', 'cached': False})
+            
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}")
+            yield sse_event('error', {'error': f"Error generating answer: {str(e)}", 'status': 'error'})
+    
+    def stream_response(self, events):
+        """Wrap an iterator of Server-Sent Events in an unbuffered streaming response."""
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep reverse proxies from holding back the tokens
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
     def post(self, request):
-        """Process an insights request."""
+        """Process an insights request.
+        
+        With `"stream": true` in the body the answer is sent as Server-Sent
+        Events while it is being generated instead of as one JSON object.
+        """
         try:
             data = json.loads(request.body)
             question = data.get('question')
             product_id = data.get('product_id')
+            stream = bool(data.get('stream', False))
             
             if not question:
                 return JsonResponse({
@@ -258,26 +535,43 @@ class InsightsView(View):
                     'status': 'error'
                 }, status=400)
             
+            # Repeated questions are answered from the cache until the next import
+            cache_product_id = str(product_id) if product_id else None
+            cached = self.answer_cache.get(question, cache_product_id)
+            if cached is not None:
+                logger.info(f"Cached insights answer for product {cache_product_id}: '{question}'")
+                if stream:
+                    return self.stream_response(iter([
+                        sse_event('token', {'token': cached['answer']}),
+                        sse_event('done', {'status': 'success', 'provider': cached['provider'], 'cached': True})
+                    ]))
+                return JsonResponse({**cached, 'cached': True})
+            
             # Get product if ID is provided
             product = None
             if product_id:
                 try:
-                    product = Product.objects.get(id=product_id)
+                    product = Product.objects.select_related('analysis').get(id=product_id)
                 except Product.DoesNotExist:
                     return JsonResponse({
                         'error': f'Product with ID {product_id} not found',
                         'status': 'error'
                     }, status=404)
             
-            # Generate answer
-            result = self.generate_answer(question, product)
-            
             # Log the interaction
             if product:
                 logger.info(f"Insights request for product {product.id}: '{question}'")
             else:
                 logger.info(f"General insights request: '{question}'")
             
+            if stream:
+                return self.stream_response(self.stream_answer(question, product, cache_product_id))
+            
+            # Generate answer
+            result = self.generate_answer(question, product)
+            if result['status'] == 'success':
+                self.answer_cache.set(question, result, cache_product_id)
+            
             # Return the result
             return JsonResponse(result)
             
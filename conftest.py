@@ -0,0 +1,13 @@
+import pytest
+from django.core.cache import caches
+
+@pytest.fixture(autouse=True)
+def local_caches(settings):
+    """Keep tests off the shared file-based cache used by the running site."""
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+        'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-responses'},
+    }
+    # Local-memory caches outlive a test, so start each one empty
+    for alias in settings.CACHES:
+        caches[alias].clear()
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     
     # Third-party apps
     'rest_framework',
+    'django_filters',
     
     # Local apps
     'api',
@@ -105,6 +106,24 @@ DATABASES = {
 # }
 
 
+# Cache
+# The importer runs in its own process and invalidates cached data by bumping a
+# version key, so the cache must be shared between processes (file-based,
+# Redis or Memcached rather than local memory). Cached API responses are keyed
+# on that version, so they can live in any backend, including local memory.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'data' / 'django_cache')),
+    },
+    'responses': {
+        'BACKEND': config('RESPONSE_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('RESPONSE_CACHE_LOCATION', default='api-responses'),
+        'TIMEOUT': config('RESPONSE_CACHE_TIMEOUT', default=60 * 60, cast=int),
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -155,6 +174,24 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Scraper page cache
+SCRAPER_CACHE_DIR = config('SCRAPER_CACHE_DIR', default=str(BASE_DIR / 'data' / 'page_cache'))
+SCRAPER_CACHE_TTL = config('SCRAPER_CACHE_TTL', default=24 * 60 * 60, cast=int)
+SCRAPER_CACHE_MAX_BYTES = config('SCRAPER_CACHE_MAX_BYTES', default=500 * 1024 * 1024, cast=int)
+
 # AI API Keys
 GROQ_API_KEY = config('GROQ_API_KEY', default='')
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='')
+INSIGHTS_MODEL = config('INSIGHTS_MODEL', default='gpt-3.5-turbo')
+INSIGHTS_TIMEOUT = config('INSIGHTS_TIMEOUT', default=60, cast=float)
+# Candidate products retrieved for general questions and the token budget their descriptions may use
+INSIGHTS_CONTEXT_PRODUCTS = config('INSIGHTS_CONTEXT_PRODUCTS', default=20, cast=int)
+INSIGHTS_CONTEXT_TOKENS = config('INSIGHTS_CONTEXT_TOKENS', default=400, cast=int)
+
+# Insights answer cache (per process, invalidated by every import)
+INSIGHTS_CACHE_TTL = config('INSIGHTS_CACHE_TTL', default=60 * 60, cast=int)
+INSIGHTS_CACHE_MAX_ENTRIES = config('INSIGHTS_CACHE_MAX_ENTRIES', default=1000, cast=int)
+# Word-overlap threshold (0-1) for answering near-duplicate questions; 0 disables it.
+# Lossy: word sets ignore order and negation, so "under 800" can match "over 800"
+INSIGHTS_CACHE_SIMILARITY = config('INSIGHTS_CACHE_SIMILARITY', default=0, cast=float)
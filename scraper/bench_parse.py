@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark the product page parser backends against saved HTML pages.
+"""
+
+import time
+import logging
+import argparse
+from scraper import parse_product_page
+
+BACKENDS = [
+    ('html.parser', False),
+    ('html.parser', True),
+    ('lxml', False),
+    ('lxml', True),
+]
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description='Product page parser benchmark')
+    parser.add_argument('html_files', nargs='+',
+                        help='Saved Amazon product pages to parse')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of passes over the pages for each backend')
+    return parser.parse_args()
+
+def benchmark(pages, parser, targeted, repeat):
+    """Return the pages per second one core parses with the given backend."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, html in pages:
+            parse_product_page(html, url, parser=parser, targeted=targeted)
+    elapsed = time.perf_counter() - start
+    return len(pages) * repeat / elapsed
+
+def main():
+    """Run the benchmark."""
+    args = parse_args()
+
+    # Per-field logging would dominate the timings
+    logging.disable(logging.INFO)
+
+    pages = []
+    for path in args.html_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append((path, f.read()))
+
+    print(f"Parsing {len(pages)} pages x {args.repeat} passes on a single core")
+    for parser, targeted in BACKENDS:
+        mode = 'targeted' if targeted else 'full tree'
+        rate = benchmark(pages, parser, targeted, args.repeat)
+        print(f"{parser:<12} {mode:<10} {rate:8.1f} pages/sec/core")
+
+if __name__ == "__main__":
+    main()
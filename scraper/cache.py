@@ -0,0 +1,157 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger('amazon_scraper')
+
+def normalize_url(url):
+    """Normalize a URL so equivalent spellings share one cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == 'http' and netloc.endswith(':80')) or (scheme == 'https' and netloc.endswith(':443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+class CachedPage:
+    """A page stored in the cache together with its validators."""
+
+    def __init__(self, url, html, fetched_at, etag=None, last_modified=None):
+        self.url = url
+        self.html = html
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, ttl):
+        """Return True if the page was fetched less than `ttl` seconds ago."""
+        return ttl is not None and time.time() - self.fetched_at < ttl
+
+    def conditional_headers(self):
+        """Build the headers for a conditional GET revalidating this page."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class PageCache:
+    """A content-addressed on-disk cache of fetched HTML pages.
+
+    Each page is stored gzip-compressed under the SHA-256 of its normalized URL,
+    next to a small JSON file holding the fetch time and the ETag/Last-Modified
+    validators. Pages younger than `ttl` seconds are served without touching the
+    network; older ones are revalidated with a conditional GET. When the cache
+    grows past `max_bytes` the least recently used pages are evicted. In
+    `offline` mode cached pages are always served and misses never fetch, which
+    lets parser changes be replayed against a previous crawl.
+    """
+
+    def __init__(self, cache_dir='data/page_cache', ttl=24 * 60 * 60, max_bytes=500 * 1024 * 1024, offline=False):
+        """Initialize the cache in `cache_dir`, creating it if needed."""
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self._entries())
+
+        logger.info(f"Page cache at {self.cache_dir} holds {self.total_bytes / 1024 / 1024:.1f} MB")
+
+    def _paths(self, url):
+        """Return the HTML and metadata paths for a URL."""
+        key = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+        directory = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(directory, f'{key}.html.gz'), os.path.join(directory, f'{key}.json')
+
+    def _entries(self):
+        """Yield (html path, last access time, size) for every cached page."""
+        for directory in os.scandir(self.cache_dir):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                if entry.name.endswith('.html.gz'):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_mtime, stat.st_size
+
+    def _write_atomic(self, path, data):
+        """Write bytes to `path` so readers never see a partial file."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, url):
+        """Return the cached page for a URL, or None on a miss."""
+        html_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with gzip.open(html_path, 'rt', encoding='utf-8') as f:
+                html = f.read()
+            # Mark the page as recently used for LRU eviction
+            os.utime(html_path)
+        except (OSError, ValueError):
+            return None
+
+        return CachedPage(url, html, meta['fetched_at'], meta.get('etag'), meta.get('last_modified'))
+
+    def put(self, url, html, etag=None, last_modified=None):
+        """Store a freshly fetched page."""
+        html_path, meta_path = self._paths(url)
+        data = gzip.compress(html.encode('utf-8'))
+        try:
+            old_size = os.path.getsize(html_path)
+        except OSError:
+            old_size = 0
+
+        self._write_atomic(html_path, data)
+        self._write_meta(meta_path, url, etag, last_modified)
+
+        with self.lock:
+            self.total_bytes += len(data) - old_size
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def refresh(self, page):
+        """Record that a cached page was revalidated by a 304 response."""
+        _, meta_path = self._paths(page.url)
+        self._write_meta(meta_path, page.url, page.etag, page.last_modified)
+
+    def _write_meta(self, meta_path, url, etag, last_modified):
+        """Write the metadata file for a page."""
+        meta = {
+            'url': normalize_url(url),
+            'fetched_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified
+        }
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def _evict(self):
+        """Delete least recently used pages until the cache fits in max_bytes."""
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for html_path, _, size in sorted(self._entries(), key=lambda entry: entry[1]):
+            if self.total_bytes <= target:
+                break
+            for path in (html_path, html_path[:-len('.html.gz')] + '.json'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.total_bytes -= size
+            evicted += 1
+
+        logger.info(f"Evicted {evicted} pages from the page cache")
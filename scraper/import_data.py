@@ -1,14 +1,30 @@
 import os
+import sys
 import json
+import time
 import django
+import itertools
 import logging
 from datetime import datetime
 
 # Setup Django environment
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ecommerce_analyzer.settings")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ecommerce_project.settings")
 django.setup()
 
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from api.models import Product
+from api.cache import bump_data_version
+from api.stats import stat_values, update_product_stats
+
+# The scraper module is importable as scraper.scraper from the project root and
+# as scraper when this script runs next to it
+try:
+    from scraper.scraper import extract_asin
+except ImportError:
+    from scraper import extract_asin
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,67 +36,226 @@ logging.basicConfig(
 )
 logger = logging.getLogger('data_import')
 
-def import_amazon_data(file_path='data/amazon_products.json'):
-    """Import Amazon product data from a JSON file into the database."""
+# Products written per transaction, and rows per INSERT/UPDATE statement
+IMPORT_CHUNK_SIZE = 1000
+BULK_BATCH_SIZE = 500
+
+# Fields refreshed when a product is scraped again
+UPDATE_FIELDS = ['name', 'price', 'description', 'rating', 'image_url', 'last_updated']
+
+def read_jsonl(f):
+    """Yield products from a JSONL stream, one per complete line.
+    
+    A trailing line without a newline is still being written by the scraper and
+    is skipped, so the stream can be imported while it grows.
+    """
+    for line in f:
+        if not line.endswith('\n'):
+            break
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def read_json_array(f, buffer_size=64 * 1024):
+    """Yield the items of a JSON array one at a time without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    
+    while True:
+        # Skip whitespace and the separators between items
+        buffer = buffer.lstrip()
+        if started and buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        
+        if buffer:
+            if not started:
+                if not buffer.startswith('['):
+                    raise ValueError("Expected a JSON array of products")
+                buffer = buffer[1:]
+                started = True
+                continue
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                item = None
+                end = None
+            # A number at the end of the buffer may be cut short (`12` of `12345`),
+            # so an item only counts once the separator after it has been read
+            if end is not None and buffer[end:].lstrip()[:1] in (',', ']'):
+                yield item
+                buffer = buffer[end:]
+                continue
+        
+        # Need more data to finish the current item
+        data = f.read(buffer_size)
+        if not data:
+            raise ValueError("Unexpected end of JSON array")
+        buffer += data
+
+def chunked(items, size):
+    """Yield lists of up to `size` items from an iterable."""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def scraped_before(product, last_updated):
+    """Return whether a scraped product is no newer than a row last updated at `last_updated`.
+    
+    Incremental JSON exports carry over products scraped in earlier runs;
+    importing them again must not mark the rows as freshly scraped.
+    """
+    try:
+        scraped_at = datetime.fromisoformat(product['scraped_at']).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return False
+    return scraped_at <= last_updated.timestamp()
+
+def upsert_products(products):
+    """Insert or update a chunk of products in a single transaction.
+    
+    Products are keyed by ASIN, or by URL when the URL carries none. Existing
+    rows for the whole chunk are loaded with one query, then products with an
+    ASIN are written with one INSERT ... ON CONFLICT (asin) DO UPDATE per batch
+    and the rest with bulk_create and bulk_update. Products scraped before
+    their row was last updated are skipped. The statistics snapshot is
+    updated in the same transaction.
+    Returns (products_added, products_updated).
+    """
+    # The last occurrence of a product in the chunk wins
+    products_by_key = {}
+    for product in products:
+        url = product.get('url', '')
+        asin = product.get('asin') or extract_asin(url)
+        products_by_key[asin or url] = (asin, url, product)
+    
+    asins = {asin for asin, _, _ in products_by_key.values() if asin}
+    urls = [url for asin, url, _ in products_by_key.values() if not asin]
+    now = timezone.now()
+    
+    with transaction.atomic():
+        existing_products = {
+            product.asin if product.asin in asins else product.url: product
+            for product in Product.objects.filter(Q(asin__in=asins) | Q(url__in=urls)).order_by()
+        }
+        
+        upserted_products = []
+        new_products = []
+        changed_products = []
+        overwritten_stats = []
+        for key, (asin, url, product) in products_by_key.items():
+            # Extract product data
+            fields = {
+                'name': product.get('name', 'Unknown Product'),
+                'price': product.get('price', 0.0),
+                'description': product.get('description', ''),
+                'rating': product.get('rating', 0.0),
+                'image_url': product.get('image_url', ''),
+                'last_updated': now,
+            }
+            
+            existing_product = existing_products.get(key)
+            if existing_product:
+                if scraped_before(product, existing_product.last_updated):
+                    continue
+                overwritten_stats.append(stat_values(existing_product))
+            
+            if asin:
+                upserted_products.append(Product(asin=asin, url=url, source='amazon', **fields))
+            elif existing_product:
+                for field, value in fields.items():
+                    setattr(existing_product, field, value)
+                changed_products.append(existing_product)
+            else:
+                new_products.append(Product(url=url, source='amazon', **fields))
+        
+        Product.objects.bulk_create(
+            upserted_products,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['asin'],
+            update_fields=UPDATE_FIELDS + ['url']
+        )
+        Product.objects.bulk_create(new_products, batch_size=BULK_BATCH_SIZE)
+        Product.objects.bulk_update(changed_products, UPDATE_FIELDS, batch_size=BULK_BATCH_SIZE)
+        
+        # Keep the statistics snapshot in step with the written rows
+        written_products = upserted_products + new_products + changed_products
+        update_product_stats([stat_values(product) for product in written_products], overwritten_stats)
+    
+    products_updated = len(overwritten_stats)
+    products_added = len(written_products) - products_updated
+    logger.info(f"Imported chunk: {products_added} added, {products_updated} updated")
+    return products_added, products_updated
+
+def import_amazon_data(file_path='data/amazon_products.json', chunk_size=IMPORT_CHUNK_SIZE, raise_errors=False,
+                       progress=None):
+    """Import Amazon product data from a JSON or JSONL file into the database.
+    
+    Failures are logged and reported as (0, 0), or raised with `raise_errors`
+    so callers such as the scrape worker can tell them from an empty import.
+    `progress`, if given, is called with the `products_added` and
+    `products_updated` counters after every chunk.
+    """
     try:
         if not os.path.exists(file_path):
+            if raise_errors:
+                raise FileNotFoundError(f"File not found: {file_path}")
             logger.error(f"File not found: {file_path}")
             return
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            products = json.load(f)
-        
-        logger.info(f"Loaded {len(products)} products from {file_path}")
-        
         # Track statistics
         products_added = 0
         products_updated = 0
+        start_time = time.perf_counter()
         
-        for product in products:
-            # Extract product data
-            name = product.get('name', 'Unknown Product')
-            price = product.get('price', 0.0)
-            description = product.get('description', '')
-            rating = product.get('rating', 0.0)
-            image_url = product.get('image_url', '')
-            url = product.get('url', '')
-            source = 'amazon'
-            
-            # Try to find existing product by URL
-            existing_product = Product.objects.filter(url=url).first()
-            
-            if existing_product:
-                # Update existing product
-                existing_product.name = name
-                existing_product.price = price
-                existing_product.description = description
-                existing_product.rating = rating
-                existing_product.image_url = image_url
-                existing_product.last_updated = datetime.now()
-                existing_product.save()
-                products_updated += 1
-                logger.info(f"Updated product: {name}")
+        # Stream the file so memory stays bounded by the chunk size
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if file_path.endswith('.jsonl'):
+                products = read_jsonl(f)
             else:
-                # Create new product
-                Product.objects.create(
-                    name=name,
-                    price=price,
-                    description=description,
-                    rating=rating,
-                    image_url=image_url,
-                    url=url,
-                    source=source
-                )
-                products_added += 1
-                logger.info(f"Added new product: {name}")
-        
-        logger.info(f"Import complete: {products_added} products added, {products_updated} products updated")
+                products = read_json_array(f)
+            
+            try:
+                for chunk in chunked(products, chunk_size):
+                    added, updated = upsert_products(chunk)
+                    products_added += added
+                    products_updated += updated
+                    if progress:
+                        progress(products_added=products_added, products_updated=products_updated)
+            finally:
+                # Each chunk commits on its own, so invalidate cached counts and
+                # responses even when a later chunk fails
+                if products_added or products_updated:
+                    bump_data_version()
+
+        elapsed = time.perf_counter() - start_time
+        rows_per_second = (products_added + products_updated) / elapsed if elapsed else 0
+        logger.info(
+            f"Import complete: {products_added} products added, {products_updated} products updated "
+            f"in {elapsed:.2f}s ({rows_per_second:.0f} rows/sec)"
+        )
         return products_added, products_updated
     
     except Exception as e:
         logger.error(f"Error importing data: {e}")
+        if raise_errors:
+            raise
         return 0, 0
 
+def load_scrape_times():
+    """Return {product url: Unix time it was last updated} for products in the database."""
+    scrape_times = {}
+    for url, last_updated in Product.objects.values_list('url', 'last_updated').iterator():
+        if url and last_updated:
+            scrape_times[url] = last_updated.timestamp()
+    return scrape_times
+
 def main():
     """Run the data import process."""
     logger.info("Starting data import process")
@@ -5,8 +5,10 @@ Runner script for the Amazon scraper.
 
 import os
 import argparse
-from scraper import EcommerceScraper
-from import_data import import_products
+from scraper import EcommerceScraper, load_scrape_times
+from cache import PageCache
+from import_data import import_amazon_data, load_scrape_times as load_db_scrape_times
+from django.core.management import call_command
 
 def parse_args():
     """Parse command line arguments."""
@@ -17,9 +19,50 @@ def parse_args():
                         help='Directory to store scraped data')
     parser.add_argument('--delay', type=float, default=2,
                         help='Delay between requests in seconds')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Number of requests to keep in flight')
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help='Maximum requests per second to a single host '
+                             '(defaults to concurrency / delay)')
+    parser.add_argument('--parser', choices=['html.parser', 'lxml'], default='html.parser',
+                        help='HTML parser backend for product pages')
+    parser.add_argument('--full-parse', action='store_true',
+                        help='Build the whole product page tree instead of only the needed subtrees')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='Parser processes to run alongside the fetchers (0 parses inline)')
+    parser.add_argument('--parse-queue', type=int, default=None,
+                        help='Maximum fetched pages waiting for a parser '
+                             '(defaults to twice the number of parse workers)')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Directory for the page cache (defaults to <output-dir>/page_cache)')
+    parser.add_argument('--cache-ttl', type=float, default=24,
+                        help='Hours a cached page is served without revalidation')
+    parser.add_argument('--cache-max-mb', type=int, default=500,
+                        help='Maximum size of the page cache in megabytes')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Fetch every page from the network')
+    parser.add_argument('--offline', action='store_true',
+                        help='Only use cached pages and never touch the network')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only scrape new products and products older than --max-age')
+    parser.add_argument('--max-age', type=float, default=24,
+                        help='Hours after which a scraped product is refreshed in incremental mode')
+    parser.add_argument('--output-format', choices=['json', 'jsonl'], default='json',
+                        help='Write one JSON array at the end, or stream products to JSONL')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted JSONL scrape from its checkpoint')
     parser.add_argument('--import', dest='do_import', action='store_true',
                         help='Import scraped data into the database')
-    return parser.parse_args()
+    parser.add_argument('--analyze', action='store_true',
+                        help='After importing, precompute the analysis of new and changed products')
+    parser.add_argument('--offline-analysis', action='store_true',
+                        help='Analyze with the local keyword and sentiment pass instead of the LLM')
+    args = parser.parse_args()
+    
+    # Only the JSONL output keeps a checkpoint to resume from
+    if args.resume and args.output_format != 'jsonl':
+        parser.error("--resume requires --output-format jsonl")
+    return args
 
 def get_amazon_config():
     """Get configuration for Amazon scraping."""
@@ -42,24 +85,58 @@ def main():
     # Create output directory if it doesn't exist
     os.makedirs(args.output_dir, exist_ok=True)
     
+    # Set up the page cache
+    cache = None
+    if not args.no_cache:
+        cache = PageCache(
+            cache_dir=args.cache_dir or os.path.join(args.output_dir, 'page_cache'),
+            ttl=args.cache_ttl * 60 * 60,
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            offline=args.offline
+        )
+    
     # Initialize and run the scraper
     scraper = EcommerceScraper(
         base_url=config['base_url'],
         output_dir=args.output_dir,
-        delay=args.delay
+        delay=args.delay,
+        concurrency=args.concurrency,
+        rate_limit=args.rate_limit,
+        parser=args.parser,
+        targeted_parsing=not args.full_parse,
+        parse_workers=args.parse_workers,
+        parse_queue_size=args.parse_queue,
+        cache=cache,
+        output_format=args.output_format
     )
     
+    # Collect when known products were last scraped
+    known_products = None
+    max_age = None
+    if args.incremental:
+        known_products = load_scrape_times(os.path.join(args.output_dir, 'amazon_products.json'))
+        for url, scraped_at in load_db_scrape_times().items():
+            known_products[url] = max(scraped_at, known_products.get(url, 0))
+        max_age = args.max_age * 60 * 60
+    
     print(f"Scraping {args.max_products} products from Amazon...")
     scraper.scrape_products(
         category_urls=config['categories'],
-        max_products=args.max_products
+        max_products=args.max_products,
+        known_products=known_products,
+        max_age=max_age,
+        resume=args.resume
     )
     
     # Import data if requested
     if args.do_import:
         print("Importing scraped data into the database...")
-        json_file = os.path.join(args.output_dir, 'amazon_products.json')
-        import_products(json_file)
+        json_file = os.path.join(args.output_dir, f'amazon_products.{args.output_format}')
+        import_amazon_data(json_file)
+        
+        if args.analyze:
+            print("Analyzing new and changed products...")
+            call_command('analyze_products', offline=args.offline_analysis)
     
     print("Done!")
 
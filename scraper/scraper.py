@@ -1,10 +1,13 @@
 import os
 import time
+import re
 import json
 import random
+import threading
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from bs4 import BeautifulSoup, SoupStrainer
+from urllib.parse import urljoin, urlparse, parse_qsl
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import logging
 from datetime import datetime
 from requests.adapters import HTTPAdapter
@@ -21,14 +24,427 @@ logging.basicConfig(
 )
 logger = logging.getLogger('amazon_scraper')
 
+# Amazon product identifiers
+ASIN_PATTERN = re.compile(r'[A-Z0-9]{10}')
+PRODUCT_PATH_PATTERN = re.compile(r'/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?:[/?]|$)')
+
+# Amazon product page selectors
+AMAZON_PRODUCT_SELECTORS = {
+    'name': '#productTitle',
+    'price': '.a-price .a-offscreen',
+    'description': '#productDescription, #feature-bullets',
+    'rating': '.a-star-rating-wrapper .a-icon-alt, .a-icon-star-small .a-icon-alt',
+    'reviews': '#acrCustomerReviewText',
+    'image': '#landingImage'
+}
+
+# Elements that anchor the product page selectors above
+PRODUCT_DETAIL_IDS = {'productTitle', 'productDescription', 'feature-bullets', 'acrCustomerReviewText', 'landingImage'}
+PRODUCT_DETAIL_CLASSES = {'a-price', 'a-star-rating-wrapper', 'a-icon-star-small'}
+
+def _is_product_detail_tag(name, attrs):
+    """Return True for tags whose subtree is needed to extract product details."""
+    if attrs.get('id') in PRODUCT_DETAIL_IDS:
+        return True
+    classes = attrs.get('class') or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return not PRODUCT_DETAIL_CLASSES.isdisjoint(classes)
+
+# Only build the product page subtrees the selectors look at
+PRODUCT_DETAIL_STRAINER = SoupStrainer(_is_product_detail_tag)
+
+class TokenBucket:
+    """A thread-safe token bucket that paces requests to a single host."""
+    
+    def __init__(self, rate, capacity=1):
+        """Allow `rate` requests per second with bursts of up to `capacity`."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available and consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HostRateLimiter:
+    """Keeps one token bucket per host so every site gets its own politeness limit."""
+    
+    def __init__(self, rate, capacity=1):
+        """Allow `rate` requests per second to each host; a falsy rate disables limiting."""
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.lock = threading.Lock()
+    
+    def acquire(self, url):
+        """Wait for permission to send a request to the host of `url`."""
+        if not self.rate:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.capacity)
+        bucket.acquire()
+
+class ConnectionHealth:
+    """Shared connectivity state with a circuit breaker for the whole crawl.
+    
+    Connectivity is probed once at startup and again only after
+    `failure_threshold` consecutive connection failures. While the circuit is
+    open every worker pauses until a probe succeeds or `max_pause` expires, so a
+    probe target that is blocked on this network cannot stall the crawl for good.
+    """
+    
+    def __init__(self, failure_threshold=3, probe_interval=5, max_pause=60,
+                 probe_address=("8.8.8.8", 53)):
+        """Initialize the health state; the circuit starts closed."""
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.max_pause = max_pause
+        self.probe_address = probe_address
+        self.consecutive_failures = 0
+        self.online = True
+        self.lock = threading.Lock()
+        self.circuit_closed = threading.Event()
+        self.circuit_closed.set()
+    
+    def probe(self):
+        """Check if there's an active internet connection and record the result."""
+        try:
+            # Try to connect to a reliable host
+            socket.create_connection(self.probe_address, timeout=3).close()
+            self.online = True
+        except OSError:
+            self.online = False
+        return self.online
+    
+    def wait_until_available(self):
+        """Block while the circuit is open."""
+        self.circuit_closed.wait(self.max_pause)
+    
+    def record_success(self):
+        """Reset the failure counter after a successful request."""
+        self.consecutive_failures = 0
+    
+    def record_failure(self):
+        """Count a connection failure and trip the circuit once the threshold is hit."""
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures < self.failure_threshold or not self.circuit_closed.is_set():
+                return
+            self.circuit_closed.clear()
+        
+        logger.warning(f"{self.consecutive_failures} consecutive connection failures, pausing crawl")
+        deadline = time.monotonic() + self.max_pause
+        while not self.probe() and time.monotonic() < deadline:
+            time.sleep(self.probe_interval)
+        
+        if self.online:
+            logger.info("Connection restored, resuming crawl")
+        else:
+            logger.error("No internet connection available, resuming crawl anyway")
+        self.consecutive_failures = 0
+        self.circuit_closed.set()
+
+def extract_asin(url):
+    """Return the ASIN of an Amazon product URL, or None if it has none.
+    
+    Handles /dp/ and /gp/product/ links as well as sponsored redirects such as
+    /sspa/click?...&url=%2F...%2Fdp%2F<ASIN>%2F... that carry the product URL
+    URL-encoded in their query string.
+    """
+    parsed = urlparse(url)
+    match = PRODUCT_PATH_PATTERN.search(parsed.path)
+    if match:
+        return match.group(1)
+    
+    for _, value in parse_qsl(parsed.query):
+        if value.startswith('/') or value.startswith('http'):
+            asin = extract_asin(value)
+            if asin:
+                return asin
+    return None
+
+def canonical_product_url(asin, base_url='https://www.amazon.com'):
+    """Return the canonical product page URL for an ASIN."""
+    return urljoin(base_url, f'/dp/{asin}')
+
+def load_scrape_times(file_path):
+    """Return {product url: Unix time it was scraped} from a previous JSON export."""
+    if not os.path.exists(file_path):
+        return {}
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        products = json.load(f)
+    
+    scrape_times = {}
+    for product in products:
+        try:
+            scrape_times[product['url']] = datetime.fromisoformat(product['scraped_at']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            continue
+    return scrape_times
+
+def _truncate_partial_line(file_path):
+    """Drop a trailing line left incomplete by an interrupted write."""
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b'\n':
+            return
+        
+        # Scan backwards for the last complete line without reading the whole file
+        position = end
+        while position > 0:
+            step = min(64 * 1024, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b'\n')
+            if newline != -1:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+def extract_text(soup, selector, default=''):
+    """Extract text from an element."""
+    element = soup.select_one(selector)
+    return element.get_text(strip=True) if element else default
+
+def parse_product_page(html, product_url, parser='html.parser', targeted=True):
+    """Parse an Amazon product page into a product dict.
+    
+    `parser` is the BeautifulSoup tree builder to use ('html.parser' or 'lxml').
+    With `targeted` set only the subtrees matched by PRODUCT_DETAIL_STRAINER are
+    built, which skips most of the page while yielding the same product.
+    """
+    parse_only = PRODUCT_DETAIL_STRAINER if targeted else None
+    soup = BeautifulSoup(html, parser, parse_only=parse_only)
+    
+    try:
+        # Extract product details
+        name = None
+        for selector in AMAZON_PRODUCT_SELECTORS['name'].split(','):
+            name_element = soup.select_one(selector.strip())
+            if name_element:
+                name = name_element.get_text(strip=True)
+                logger.info(f"Found product name: {name[:50]}...")
+                break
+        
+        price = None
+        for selector in AMAZON_PRODUCT_SELECTORS['price'].split(','):
+            price_text = extract_text(soup, selector.strip())
+            if price_text:
+                # Extract numerical value from price text
+                price = ''.join([c for c in price_text if c.isdigit() or c == '.'])
+                try:
+                    price = float(price)
+                    logger.info(f"Found product price: ${price}")
+                    break
+                except ValueError:
+                    continue
+        
+        description = None
+        for selector in AMAZON_PRODUCT_SELECTORS['description'].split(','):
+            description = extract_text(soup, selector.strip())
+            if description:
+                logger.info(f"Found product description: {description[:50]}...")
+                break
+        
+        rating = None
+        for selector in AMAZON_PRODUCT_SELECTORS['rating'].split(','):
+            rating_text = extract_text(soup, selector.strip())
+            if rating_text:
+                # Extract numerical rating
+                rating_match = re.search(r'([0-9.]+)', rating_text)
+                if rating_match:
+                    try:
+                        rating = float(rating_match.group(1))
+                        if rating > 5:  # Normalize to 5-star scale
+                            rating = rating / 20
+                        logger.info(f"Found product rating: {rating}")
+                        break
+                    except ValueError:
+                        continue
+        
+        # Extract image URL
+        image_url = None
+        image_element = soup.select_one(AMAZON_PRODUCT_SELECTORS['image'])
+        if image_element and image_element.has_attr('src'):
+            image_url = image_element['src']
+            logger.info(f"Found product image: {image_url[:50]}...")
+        
+        # Build the product object
+        product = {
+            'name': name if name else "Unknown Product",
+            'price': price if price is not None else 0.0,
+            'description': description if description else "",
+            'rating': rating if rating is not None else 0.0,
+            'image_url': image_url,
+            'url': product_url,
+            'asin': extract_asin(product_url),
+            'source': 'amazon',
+            'scraped_at': datetime.now().isoformat()
+        }
+        
+        logger.info(f"Scraped details for Amazon product: {name}")
+        return product
+        
+    except Exception as e:
+        logger.error(f"Error scraping product details from {product_url}: {e}")
+        return None
+
+class JsonProductSink:
+    """Collects products in memory and writes them as one JSON array on close.
+    
+    With `keep_previous` the products of the existing file that were not
+    scraped again are carried over, so an incremental run keeps the scrape
+    times of the products it skipped.
+    """
+    
+    def __init__(self, output_path, keep_previous=False):
+        self.output_path = output_path
+        self.keep_previous = keep_previous
+        self.products = []
+        self.completed = set()
+    
+    def write(self, product):
+        """Add a scraped product."""
+        self.products.append(product)
+        self.completed.add(product['url'])
+    
+    def _load_previous(self):
+        """Return the products of the existing output file."""
+        if not os.path.exists(self.output_path):
+            return []
+        try:
+            with open(self.output_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read previous products from {self.output_path}: {e}")
+            return []
+    
+    def close(self):
+        """Save products to a JSON file."""
+        products = self.products
+        if self.keep_previous:
+            previous = [product for product in self._load_previous() if product.get('url') not in self.completed]
+            logger.info(f"Keeping {len(previous)} previously scraped products in {self.output_path}")
+            products = previous + products
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            json.dump(products, f, indent=2, ensure_ascii=False)
+    
+    def results(self):
+        """Return the scraped products."""
+        return self.products
+
+class JsonlProductSink:
+    """Appends products to a JSONL file as they are scraped.
+    
+    Each product is flushed as one line, then its URL is appended to a
+    checkpoint file. A product written just before a crash may be missing from
+    the checkpoint and scraped again on resume; the importer upserts by URL so
+    the duplicate line is harmless.
+    """
+    
+    def __init__(self, output_path, checkpoint_path, resume=False):
+        """Open the output files, keeping their contents when resuming."""
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path
+        self.completed = set()
+        self.lock = threading.Lock()
+        
+        if resume:
+            self.completed = self._load_checkpoint()
+            _truncate_partial_line(self.output_path)
+            logger.info(f"Resuming scrape with {len(self.completed)} products already completed")
+        
+        mode = 'a' if resume else 'w'
+        self.output = open(self.output_path, mode, encoding='utf-8')
+        self.checkpoint = open(self.checkpoint_path, mode, encoding='utf-8')
+    
+    def _load_checkpoint(self):
+        """Return the product URLs recorded in the checkpoint file."""
+        _truncate_partial_line(self.checkpoint_path)
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+    
+    def write(self, product):
+        """Append a product and record its URL as completed."""
+        with self.lock:
+            self.output.write(json.dumps(product, ensure_ascii=False) + '\n')
+            self.output.flush()
+            self.checkpoint.write(product['url'] + '\n')
+            self.checkpoint.flush()
+            self.completed.add(product['url'])
+    
+    def close(self):
+        """Close the output files."""
+        self.output.close()
+        self.checkpoint.close()
+    
+    def results(self):
+        """Return the URLs of the scraped products."""
+        return sorted(self.completed)
+
 class EcommerceScraper:
     """A scraper for Amazon to extract product data."""
     
-    def __init__(self, base_url='https://www.amazon.com', output_dir='data', delay=2):
-        """Initialize the scraper with the given parameters."""
+    def __init__(self, base_url='https://www.amazon.com', output_dir='data', delay=2,
+                 concurrency=1, rate_limit=None, parser='html.parser', targeted_parsing=True,
+                 parse_workers=0, parse_queue_size=None, cache=None, output_format='json'):
+        """Initialize the scraper with the given parameters.
+        
+        `concurrency` is the number of requests kept in flight. `rate_limit` is the
+        maximum number of requests per second sent to a single host; it defaults to
+        one request per `delay` seconds for each concurrent worker.
+        `parser` selects the BeautifulSoup tree builder and `targeted_parsing`
+        limits product pages to the subtrees the detail selectors need.
+        With `parse_workers` set, product pages are parsed in a process pool of
+        that size while the fetch threads keep downloading; `parse_queue_size`
+        bounds how many fetched pages may wait for a parser (default: twice the
+        number of parse workers). `cache` is an optional PageCache that serves
+        and revalidates previously fetched pages. `output_format` is 'json' for a
+        single amazon_products.json array or 'jsonl' to stream products to
+        amazon_products.jsonl as they are scraped.
+        """
         self.base_url = base_url
         self.output_dir = output_dir
         self.delay = delay
+        self.concurrency = max(1, int(concurrency))
+        self.parser = parser
+        self.targeted_parsing = targeted_parsing
+        self.parse_workers = max(0, int(parse_workers))
+        self.parse_queue_size = parse_queue_size or 2 * self.parse_workers
+        self.parse_pool = None
+        self.cache = cache
+        self.output_format = output_format
+        
+        # ASINs discovered so far in this run
+        self.seen_asins = set()
+        
+        if rate_limit is None:
+            rate_limit = self.concurrency / delay if delay else None
+        self.rate_limiter = HostRateLimiter(rate_limit, capacity=self.concurrency)
+        self.health = ConnectionHealth()
         
         # More realistic browser headers
         self.headers = {
@@ -67,42 +483,66 @@ class EcommerceScraper:
             backoff_factor=0.5,  # wait 0.5, 1, 2, 4, 8 seconds between retries
             status_forcelist=[500, 502, 503, 504],  # HTTP status codes to retry on
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # Keep a pooled connection for every concurrent worker
+        pool_size = max(10, self.concurrency)
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=pool_size, pool_maxsize=pool_size)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         session.headers.update(self.headers)
         return session
     
-    def _check_internet_connection(self):
-        """Check if there's an active internet connection."""
-        try:
-            # Try to connect to a reliable host
-            socket.create_connection(("8.8.8.8", 53), timeout=3)
-            return True
-        except OSError:
-            return False
-    
     def _get_page(self, url):
         """Fetch a page and return the BeautifulSoup object."""
-        if not self._check_internet_connection():
-            logger.error("No internet connection available")
+        html = self._fetch_html(url)
+        if html is None:
             return None
-            
+        return BeautifulSoup(html, self.parser)
+    
+    def _fetch_html(self, url):
+        """Fetch a page and return its HTML text, going through the page cache if any."""
+        cached = self.cache.get(url) if self.cache else None
+        if cached and (self.cache.offline or cached.is_fresh(self.cache.ttl)):
+            logger.info(f"Using cached page for {url}")
+            return cached.html
+        if self.cache and self.cache.offline:
+            logger.warning(f"Page not cached, skipping in offline mode: {url}")
+            return None
+        
+        self.health.wait_until_available()
+        
         try:
-            # Random delay between requests
-            random_delay = self.delay * (1 + random.uniform(-0.2, 0.5))
-            time.sleep(random_delay)
+            # Wait for the per-host rate limiter instead of sleeping a fixed delay
+            self.rate_limiter.acquire(url)
             
             logger.info(f"Fetching {url}")
-            response = self.session.get(url, timeout=10)
+            headers = cached.conditional_headers() if cached else None
+            try:
+                response = self.session.get(url, timeout=10, headers=headers)
+            except requests.exceptions.ConnectionError:
+                self.health.record_failure()
+                raise
+            self.health.record_success()
+            
+            # The cached copy is still current
+            if cached and response.status_code == 304:
+                logger.info(f"Cached page for {url} revalidated")
+                self.cache.refresh(cached)
+                return cached.html
+            
             response.raise_for_status()
             
             # Check if we got a valid response
             if 'Robot Check' in response.text or 'captcha' in response.text.lower():
                 logger.error("Amazon is requesting verification. Try again later.")
                 return None
-                
-            return BeautifulSoup(response.text, 'html.parser')
+            
+            if self.cache:
+                self.cache.put(
+                    url, response.text,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+            return response.text
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching {url}: {e}")
             return None
@@ -142,45 +582,19 @@ class EcommerceScraper:
             
             # Process Amazon product cards
             for i, card in enumerate(product_cards):
-                # Try different methods to extract product links
-                
-                # Method 1: Standard link
-                link_element = card.select_one(amazon_selectors['link_selector'])
-                if link_element and link_element.has_attr('href'):
-                    link = link_element['href']
-                    absolute_url = urljoin(self.base_url, link)
-                    product_links.append(absolute_url)
-                    logger.info(f"Found product link: {absolute_url}")
+                asin = self._find_card_asin(card, amazon_selectors)
+                if not asin:
                     continue
                 
-                # Method 2: Title link
-                if amazon_selectors['title_selector']:
-                    title_element = card.select_one(amazon_selectors['title_selector'])
-                    if title_element and title_element.parent and title_element.parent.has_attr('href'):
-                        link = title_element.parent['href']
-                        absolute_url = urljoin(self.base_url, link)
-                        product_links.append(absolute_url)
-                        logger.info(f"Found product link via title: {absolute_url}")
-                        continue
-                
-                # Method 3: ASIN
-                if amazon_selectors['link_attr'] in card.attrs:
-                    asin = card.get(amazon_selectors['link_attr'])
-                    if asin:
-                        absolute_url = f"https://www.amazon.com/dp/{asin}"
-                        product_links.append(absolute_url)
-                        logger.info(f"Found product link from ASIN: {absolute_url}")
-                        continue
+                # Skip products already discovered in this run
+                if asin in self.seen_asins:
+                    logger.info(f"Skipping duplicate product: {asin}")
+                    continue
+                self.seen_asins.add(asin)
                 
-                # Method 4: Any link
-                any_links = card.select('a')
-                for a_link in any_links:
-                    if a_link.has_attr('href') and ('/dp/' in a_link['href'] or '/gp/product/' in a_link['href']):
-                        link = a_link['href']
-                        absolute_url = urljoin(self.base_url, link)
-                        product_links.append(absolute_url)
-                        logger.info(f"Found product link: {absolute_url}")
-                        break
+                absolute_url = canonical_product_url(asin, self.base_url)
+                product_links.append(absolute_url)
+                logger.info(f"Found product link: {absolute_url}")
             
             logger.info(f"Scraped {len(product_cards)} products from page {page}")
             
@@ -198,139 +612,193 @@ class EcommerceScraper:
         logger.info(f"Total product links found: {len(product_links)}")
         return product_links
     
+    def _find_card_asin(self, card, amazon_selectors):
+        """Return the ASIN of the product behind a search result card."""
+        # Try different methods to extract the product link
+        
+        # Method 1: Standard link
+        link_element = card.select_one(amazon_selectors['link_selector'])
+        if link_element and link_element.has_attr('href'):
+            asin = extract_asin(link_element['href'])
+            if asin:
+                return asin
+        
+        # Method 2: Title link
+        if amazon_selectors['title_selector']:
+            title_element = card.select_one(amazon_selectors['title_selector'])
+            if title_element and title_element.parent and title_element.parent.has_attr('href'):
+                asin = extract_asin(title_element.parent['href'])
+                if asin:
+                    return asin
+        
+        # Method 3: ASIN
+        asin = card.get(amazon_selectors['link_attr'])
+        if asin and ASIN_PATTERN.fullmatch(asin):
+            return asin
+        
+        # Method 4: Any link
+        for a_link in card.select('a'):
+            if a_link.has_attr('href'):
+                asin = extract_asin(a_link['href'])
+                if asin:
+                    return asin
+        
+        return None
+    
     def scrape_product_details(self, product_url):
         """Scrape details from an Amazon product page."""
-        soup = self._get_page(product_url)
-        if not soup:
+        html = self._fetch_html(product_url)
+        if html is None:
             return None
         
-        # Amazon selectors
-        amazon_selectors = {
-            'name': '#productTitle',
-            'price': '.a-price .a-offscreen',
-            'description': '#productDescription, #feature-bullets',
-            'rating': '.a-star-rating-wrapper .a-icon-alt, .a-icon-star-small .a-icon-alt',
-            'reviews': '#acrCustomerReviewText',
-            'image': '#landingImage'
-        }
-        
         logger.info(f"Scraping product details: {product_url}")
-        
-        try:
-            # Extract product details
-            name = None
-            for selector in amazon_selectors['name'].split(','):
-                name_element = soup.select_one(selector.strip())
-                if name_element:
-                    name = name_element.get_text(strip=True)
-                    logger.info(f"Found product name: {name[:50]}...")
-                    break
-            
-            price = None
-            for selector in amazon_selectors['price'].split(','):
-                price_text = self._extract_text(soup, selector.strip())
-                if price_text:
-                    # Extract numerical value from price text
-                    price = ''.join([c for c in price_text if c.isdigit() or c == '.'])
-                    try:
-                        price = float(price)
-                        logger.info(f"Found product price: ${price}")
-                        break
-                    except ValueError:
-                        continue
-            
-            description = None
-            for selector in amazon_selectors['description'].split(','):
-                description = self._extract_text(soup, selector.strip())
-                if description:
-                    logger.info(f"Found product description: {description[:50]}...")
-                    break
-            
-            rating = None
-            for selector in amazon_selectors['rating'].split(','):
-                rating_text = self._extract_text(soup, selector.strip())
-                if rating_text:
-                    # Extract numerical rating
-                    import re
-                    rating_match = re.search(r'([0-9.]+)', rating_text)
-                    if rating_match:
-                        try:
-                            rating = float(rating_match.group(1))
-                            if rating > 5:  # Normalize to 5-star scale
-                                rating = rating / 20
-                            logger.info(f"Found product rating: {rating}")
-                            break
-                        except ValueError:
-                            continue
-            
-            # Extract image URL
-            image_url = None
-            image_element = soup.select_one(amazon_selectors['image'])
-            if image_element and image_element.has_attr('src'):
-                image_url = image_element['src']
-                logger.info(f"Found product image: {image_url[:50]}...")
-            
-            # Build the product object
-            product = {
-                'name': name if name else "Unknown Product",
-                'price': price if price is not None else 0.0,
-                'description': description if description else "",
-                'rating': rating if rating is not None else 0.0,
-                'image_url': image_url,
-                'url': product_url,
-                'source': 'amazon',
-                'scraped_at': datetime.now().isoformat()
-            }
-            
-            logger.info(f"Scraped details for Amazon product: {name}")
-            return product
-            
-        except Exception as e:
-            logger.error(f"Error scraping product details from {product_url}: {e}")
-            return None
+        return parse_product_page(html, product_url, parser=self.parser, targeted=self.targeted_parsing)
     
-    def _extract_text(self, soup, selector, default=''):
-        """Extract text from an element."""
-        element = soup.select_one(selector)
-        return element.get_text(strip=True) if element else default
+    def _scrape_product_details_batch(self, product_links):
+        """Scrape details for several products, keeping up to `concurrency` requests in flight.
+        
+        Products are yielded in link order as soon as they are ready.
+        """
+        if self.parse_pool:
+            yield from self._scrape_product_details_pipeline(product_links)
+            return
+        
+        if self.concurrency <= 1:
+            results = map(self.scrape_product_details, product_links)
+            yield from (product for product in results if product)
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = executor.map(self.scrape_product_details, product_links)
+            yield from (product for product in results if product)
     
-    def scrape_products(self, category_urls, max_products=200):
-        """Scrape products from Amazon categories up to a maximum number."""
-        all_products = []
+    def _scrape_product_details_pipeline(self, product_links):
+        """Fetch product pages on threads and parse them in the process pool."""
+        parse_slots = threading.BoundedSemaphore(self.parse_queue_size)
         
-        for category_url in category_urls:
-            # Calculate how many pages to scrape
-            products_per_page = 20
-            pages_needed = min(5, max_products // products_per_page)
-            
-            product_links = self.scrape_product_links(category_url, num_pages=pages_needed)
-            
-            # Take a random sample if we have more links than needed
-            remaining_products = max_products - len(all_products)
-            if len(product_links) > remaining_products:
-                product_links = random.sample(product_links, remaining_products)
+        def fetch_and_submit(product_url):
+            html = self._fetch_html(product_url)
+            if html is None:
+                return None
             
-            # Scrape details for each product
-            for link in product_links:
-                product = self.scrape_product_details(link)
+            # Block the fetcher while the parse queue is full
+            parse_slots.acquire()
+            future = self.parse_pool.submit(
+                parse_product_page, html, product_url, self.parser, self.targeted_parsing
+            )
+            future.add_done_callback(lambda f: parse_slots.release())
+            return future
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for product_url, future in zip(product_links, executor.map(fetch_and_submit, product_links)):
+                if future is None:
+                    continue
+                try:
+                    product = future.result()
+                except Exception as e:
+                    logger.error(f"Error parsing product details from {product_url}: {e}")
+                    continue
                 if product:
-                    all_products.append(product)
-                
-                if len(all_products) >= max_products:
-                    break
-            
-            if len(all_products) >= max_products:
-                break
+                    yield product
+    
+    def _filter_stale_links(self, product_links, known_products, max_age):
+        """Keep only links for new products or products last scraped over `max_age` seconds ago."""
+        cutoff = time.time() - max_age
+        stale_links = [link for link in product_links if known_products.get(link, 0) < cutoff]
+        logger.info(f"Skipping {len(product_links) - len(stale_links)} products scraped in the last {max_age / 3600:.1f} hours")
+        return stale_links
+    
+    def scrape_products(self, category_urls, max_products=200, known_products=None, max_age=None,
+                        resume=False, progress=None):
+        """Scrape products from Amazon categories up to a maximum number.
+        
+        For an incremental refresh pass `known_products`, a mapping of canonical
+        product URL to the Unix time it was last scraped, and `max_age` in
+        seconds: only new products and products older than that are fetched.
+        With the 'json' output format the products skipped this way stay in
+        amazon_products.json.
+        
+        With the 'jsonl' output format every product is appended to
+        amazon_products.jsonl as soon as it is scraped, and its URL recorded in
+        a checkpoint file; `resume` continues an interrupted run from that
+        checkpoint. In this mode only the scraped product URLs are returned, so
+        memory does not grow with the run.
+        
+        `progress`, if given, is called with the `links_found` and
+        `products_scraped` counters whenever either of them changes.
+        """
+        if self.output_format == 'jsonl':
+            sink = JsonlProductSink(
+                os.path.join(self.output_dir, 'amazon_products.jsonl'),
+                os.path.join(self.output_dir, 'amazon_products.checkpoint'),
+                resume=resume
+            )
+        else:
+            if resume:
+                logger.warning("Resuming needs the 'jsonl' output format; starting the scrape over")
+            # An incremental run only scrapes stale products; keep the rest in the export
+            sink = JsonProductSink(
+                os.path.join(self.output_dir, 'amazon_products.json'),
+                keep_previous=known_products is not None and max_age is not None
+            )
         
-        logger.info(f"Scraped a total of {len(all_products)} Amazon products")
+        self.seen_asins = set()
+        links_found = 0
         
-        # Save products to a JSON file
-        output_path = os.path.join(self.output_dir, 'amazon_products.json')
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(all_products, f, indent=2, ensure_ascii=False)
+        # Probe connectivity once up front instead of before every request; an
+        # offline replay only reads the page cache and must not touch the network
+        offline = self.cache is not None and self.cache.offline
+        if not offline and not self.health.probe():
+            logger.error("No internet connection available")
+        
+        if self.parse_workers:
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        
+        try:
+            for category_url in category_urls:
+                # A resumed checkpoint may already hold enough products
+                if len(sink.completed) >= max_products:
+                    break
+                
+                # Calculate how many pages to scrape
+                products_per_page = 20
+                pages_needed = min(5, max_products // products_per_page)
+                
+                product_links = self.scrape_product_links(category_url, num_pages=pages_needed)
+                
+                # Skip products completed before the run was interrupted
+                product_links = [link for link in product_links if link not in sink.completed]
+                
+                # Only refresh new or stale products in incremental mode
+                if known_products is not None and max_age is not None:
+                    product_links = self._filter_stale_links(product_links, known_products, max_age)
+                
+                # Take a random sample if we have more links than needed
+                remaining_products = max(0, max_products - len(sink.completed))
+                if len(product_links) > remaining_products:
+                    product_links = random.sample(product_links, remaining_products)
+                
+                links_found += len(product_links)
+                if progress:
+                    progress(links_found=links_found, products_scraped=len(sink.completed))
+                
+                # Scrape details for each product
+                for product in self._scrape_product_details_batch(product_links):
+                    sink.write(product)
+                    if progress:
+                        progress(links_found=links_found, products_scraped=len(sink.completed))
+                    
+                    if len(sink.completed) >= max_products:
+                        break
+        finally:
+            if self.parse_pool:
+                self.parse_pool.shutdown()
+                self.parse_pool = None
+            sink.close()
         
-        logger.info(f"Saved Amazon product data to {output_path}")
-        return all_products
+        logger.info(f"Scraped a total of {len(sink.completed)} Amazon products")
+        logger.info(f"Saved Amazon product data to {sink.output_path}")
+        return sink.results()
 
 def main():
     """Run the Amazon scraper."""
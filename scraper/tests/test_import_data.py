@@ -0,0 +1,86 @@
+import io
+import json
+from datetime import datetime
+import pytest
+from api.cache import get_data_version
+from api.models import Product
+from scraper import import_data
+from scraper.import_data import import_amazon_data, read_json_array
+
+def read_all(text, buffer_size):
+    """Read every item of a JSON array through read_json_array."""
+    return list(read_json_array(io.StringIO(text), buffer_size=buffer_size))
+
+PRODUCTS = [
+    {'name': 'Cable, 6ft [2 pack]', 'price': 9.99, 'rating': 4.5},
+    {'name': 'Laptop ] , "quoted"', 'price': 1299, 'rating': None},
+    {'name': 'Mouse', 'description': 'Has ], and [ in text, plus \\u00e9', 'price': 19.5},
+]
+
+@pytest.mark.parametrize('buffer_size', [1, 2, 3, 5, 7, 64, 64 * 1024])
+def test_numbers_split_across_buffers_are_not_truncated(buffer_size):
+    assert read_all('[12345, 6789]', buffer_size) == [12345, 6789]
+    assert read_all('[1.5e10,-0.25 , 7]', buffer_size) == [1.5e10, -0.25, 7]
+
+@pytest.mark.parametrize('buffer_size', [1, 2, 3, 5, 7, 11, 64 * 1024])
+def test_strings_containing_brackets_and_commas(buffer_size):
+    assert read_all(json.dumps(PRODUCTS), buffer_size) == PRODUCTS
+    assert read_all(json.dumps(PRODUCTS, indent=2), buffer_size) == PRODUCTS
+
+@pytest.mark.parametrize('buffer_size', [1, 4, 64 * 1024])
+def test_scalars_and_empty_array(buffer_size):
+    assert read_all('[true, false, null, "a,]b"]', buffer_size) == [True, False, None, 'a,]b']
+    assert read_all('  [ ]  ', buffer_size) == []
+
+def test_every_buffer_boundary():
+    text = json.dumps([123456789, 'x]', {'n': [1, 22, 333]}, 4.25])
+    for buffer_size in range(1, len(text) + 2):
+        assert read_all(text, buffer_size) == json.loads(text)
+
+def test_rejects_non_array_and_truncated_input():
+    with pytest.raises(ValueError):
+        read_all('{"name": "x"}', 4)
+    with pytest.raises(ValueError):
+        read_all('[1, 2', 4)
+    with pytest.raises(ValueError):
+        read_all('[{"name": "x"', 4)
+
+@pytest.mark.django_db
+def test_failed_chunk_still_bumps_data_version(tmp_path, monkeypatch):
+    path = tmp_path / 'products.json'
+    path.write_text(json.dumps([
+        {'name': f'Product {i}', 'url': f'https://example.com/p/{i}', 'price': i}
+        for i in range(4)
+    ]))
+    upsert_products = import_data.upsert_products
+    calls = []
+
+    def fail_second_chunk(chunk):
+        calls.append(chunk)
+        if len(calls) == 2:
+            raise RuntimeError('database went away')
+        return upsert_products(chunk)
+
+    monkeypatch.setattr(import_data, 'upsert_products', fail_second_chunk)
+    version = get_data_version()
+    import_amazon_data(str(path), chunk_size=2)
+
+    # The first chunk committed, so caches built from the old data are stale
+    assert Product.objects.count() == 2
+    assert get_data_version() != version
+
+@pytest.mark.django_db
+def test_products_scraped_before_the_last_update_are_skipped():
+    old = {'name': 'Old', 'url': 'https://www.amazon.com/dp/B000000001', 'price': 1,
+           'scraped_at': '2020-01-01T00:00:00'}
+    assert import_data.upsert_products([old]) == (1, 0)
+
+    # A carried-over copy of the product leaves the row and its update time alone
+    last_updated = Product.objects.get().last_updated
+    assert import_data.upsert_products([dict(old, name='Stale copy')]) == (0, 0)
+    assert Product.objects.get().name == 'Old'
+    assert Product.objects.get().last_updated == last_updated
+
+    fresh = dict(old, name='New', scraped_at=datetime.now().isoformat())
+    assert import_data.upsert_products([fresh]) == (0, 1)
+    assert Product.objects.get().name == 'New'
@@ -0,0 +1,44 @@
+import json
+import time
+from datetime import datetime
+import pytest
+from scraper.scraper import EcommerceScraper, load_scrape_times
+
+LINKS = [f'https://www.amazon.com/dp/B00000000{i}' for i in range(4)]
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    """A scraper whose categories list LINKS and whose product pages scrape instantly."""
+    scraper = EcommerceScraper(output_dir=str(tmp_path), delay=0)
+    monkeypatch.setattr(scraper.health, 'probe', lambda: True)
+    monkeypatch.setattr(scraper, 'scrape_product_links', lambda category_url, num_pages=5: list(LINKS))
+    monkeypatch.setattr(scraper, '_scrape_product_details_batch', lambda links: (
+        {'name': link[-1], 'url': link, 'scraped_at': datetime.now().isoformat()} for link in links
+    ))
+    return scraper
+
+def test_incremental_json_run_keeps_skipped_products(scraper, tmp_path):
+    export = str(tmp_path / 'amazon_products.json')
+    scraper.scrape_products(['https://www.amazon.com/s?k=x'], max_products=40)
+    first = load_scrape_times(export)
+    assert sorted(first) == LINKS
+
+    # Only the stale product is scraped again; the others keep their scrape times
+    known = dict(first, **{LINKS[0]: time.time() - 48 * 60 * 60})
+    scraper.scrape_products(['https://www.amazon.com/s?k=x'], max_products=40, known_products=known, max_age=24 * 60 * 60)
+
+    with open(export, encoding='utf-8') as f:
+        assert sorted(product['url'] for product in json.load(f)) == LINKS
+    second = load_scrape_times(export)
+    assert all(second[link] == first[link] for link in LINKS[1:])
+    assert second[LINKS[0]] >= first[LINKS[0]]
+
+def test_full_json_run_replaces_the_export(scraper, tmp_path):
+    scraper.scrape_products(['https://www.amazon.com/s?k=x'], max_products=40)
+    scraper.scrape_products(['https://www.amazon.com/s?k=x'], max_products=40)
+    with open(tmp_path / 'amazon_products.json', encoding='utf-8') as f:
+        assert len(json.load(f)) == len(LINKS)
+
+def test_resume_without_jsonl_warns(scraper, caplog):
+    scraper.scrape_products(['https://www.amazon.com/s?k=x'], max_products=40, resume=True)
+    assert "Resuming needs the 'jsonl' output format" in caplog.text